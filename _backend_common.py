@@ -0,0 +1,483 @@
+"""
+Simulation helpers shared by quantum_backend.py and quantum_backend_docker.py
+
+Holds the request options, the allow-list validator for submitted circuit
+code, the measurement probability kernels, the cached circuit simulation,
+the /simulate and /simulate_batch request handling and the JSON response
+helpers.
+"""
+
+from flask import Response, current_app, jsonify, request
+import numpy as np
+import orjson
+import ast
+import base64
+import threading
+import traceback
+import os
+from collections import OrderedDict
+from functools import wraps
+
+# Amplitude dtype returned for each supported ?precision= value. Single
+# precision is the default: it is plenty for visualization and halves the
+# memory traffic of the statevector kernels and the response size.
+AMPLITUDE_DTYPES = {'single': np.complex64, 'double': np.complex128}
+
+# Supported ?device= values; 'auto' uses the GPU for circuits of at least
+# GPU_THRESHOLD qubits, where the 2^n amplitude sweep dominates
+DEVICES = ('auto', 'cpu', 'gpu')
+GPU_THRESHOLD = int(os.getenv('GPU_THRESHOLD', 18))
+
+# Upper bound on circuits per /simulate_batch request, so one request cannot
+# hold a worker for longer than the Gunicorn timeout
+MAX_BATCH_CIRCUITS = int(os.getenv('MAX_BATCH_CIRCUITS', 32))
+
+def _json(payload):
+    """Serialize a response payload with orjson, including NumPy arrays"""
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+        mimetype='application/json'
+    )
+
+def _static_json(body, etag):
+    """Serve prebuilt JSON bytes, answering a matching If-None-Match with 304"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+def _pack_statevector(payload):
+    """
+    Replace payload['statevector'] with a base64 blob for ?binary=1 responses
+    
+    The blob holds the amplitudes as interleaved little-endian floats
+    (real0, imag0, real1, imag1, ...), i.e. a raw complex64 or complex128
+    array as named by 'statevector_dtype'.
+    """
+    pairs = np.asarray(payload.pop('statevector'))
+    little_endian = pairs.astype(pairs.dtype.newbyteorder('<'), copy=False)
+    payload['statevector_b64'] = base64.b64encode(little_endian.tobytes()).decode('ascii')
+    payload['statevector_dtype'] = f'complex{pairs.dtype.itemsize * 16}_le'
+    return payload
+
+class CircuitValidationError(ValueError):
+    """Submitted code that is rejected before it runs; answered with a 400"""
+
+# QuantumCircuit methods that submitted code may call
+ALLOWED_GATES = frozenset({
+    'h', 'x', 'y', 'z', 's', 'sdg', 't', 'tdg', 'sx', 'sxdg', 'id',
+    'rx', 'ry', 'rz', 'p', 'u', 'r',
+    'cx', 'cy', 'cz', 'ch', 'cp', 'crx', 'cry', 'crz', 'cu',
+    'swap', 'iswap', 'ccx', 'cswap', 'mcx', 'barrier'
+})
+
+# NumPy names usable in gate parameters, e.g. np.pi/2 or np.sqrt(2)
+ALLOWED_NUMPY_NAMES = frozenset({
+    'pi', 'e', 'sqrt', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'exp', 'log'
+})
+
+def _is_numpy_name(node):
+    """Check for an allowed np.<name> attribute"""
+    return (isinstance(node, ast.Attribute)
+            and isinstance(node.value, ast.Name)
+            and node.value.id == 'np'
+            and node.attr in ALLOWED_NUMPY_NAMES)
+
+def _is_numeric_expr(node):
+    """Check that an expression only combines numbers and allowed NumPy names"""
+    if isinstance(node, ast.Constant):
+        return type(node.value) in (int, float)
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.op, (ast.UAdd, ast.USub)) and _is_numeric_expr(node.operand)
+    if isinstance(node, ast.BinOp):
+        return (isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div))
+                and _is_numeric_expr(node.left)
+                and _is_numeric_expr(node.right))
+    if isinstance(node, ast.Call):
+        return (_is_numpy_name(node.func)
+                and not node.keywords
+                and all(_is_numeric_expr(arg) for arg in node.args))
+    return _is_numpy_name(node)
+
+def _is_gate_arg(node):
+    """Gate arguments are numeric expressions or flat lists of them"""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return all(_is_numeric_expr(elt) for elt in node.elts)
+    return _is_numeric_expr(node)
+
+def _parse_circuit_code(qiskit_code):
+    """
+    Parse submitted circuit code once per request; return (key, tree)
+    
+    The key is the dump of the syntax tree, so sources that only differ in
+    comments and formatting share precomputed and cached results. Code that
+    does not parse raises CircuitValidationError.
+    """
+    try:
+        tree = ast.parse(qiskit_code, filename='<string>')
+    except SyntaxError as e:
+        raise CircuitValidationError(f'Invalid syntax on line {e.lineno}') from e
+    return ast.dump(tree), tree
+
+def _compile_circuit_code(tree):
+    """
+    Check parsed circuit code against an allow-list and compile it
+    
+    Only three statement forms are accepted: `name = QuantumCircuit(...)`,
+    `name.<gate>(...)` calls on such a circuit with numeric arguments, and
+    `import numpy as np`, which is dropped because np is already provided.
+    Anything else raises CircuitValidationError before the code is executed.
+    """
+    circuit_names = set()
+    body = []
+    
+    for node in tree.body:
+        if (isinstance(node, ast.Import)
+                and len(node.names) == 1
+                and node.names[0].name == 'numpy'
+                and node.names[0].asname == 'np'):
+            continue
+        
+        if (isinstance(node, ast.Assign)
+                and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)
+                and isinstance(node.value, ast.Call)
+                and isinstance(node.value.func, ast.Name)
+                and node.value.func.id == 'QuantumCircuit'
+                and not node.value.keywords
+                and all(_is_numeric_expr(arg) for arg in node.value.args)):
+            circuit_names.add(node.targets[0].id)
+            body.append(node)
+            continue
+        
+        if (isinstance(node, ast.Expr)
+                and isinstance(node.value, ast.Call)
+                and isinstance(node.value.func, ast.Attribute)
+                and isinstance(node.value.func.value, ast.Name)
+                and node.value.func.value.id in circuit_names
+                and node.value.func.attr in ALLOWED_GATES
+                and not node.value.keywords
+                and all(_is_gate_arg(arg) for arg in node.value.args)):
+            body.append(node)
+            continue
+        
+        raise CircuitValidationError(f'Unsupported statement on line {node.lineno}')
+    
+    return compile(ast.Module(body=body, type_ignores=[]), '<string>', 'exec')
+
+# Numba is optional; without it large circuits use NumPy tensor reductions
+try:
+    from numba import njit, prange, get_num_threads
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Amplitudes per tile in the Numba kernel: 4096 complex64 values are 32 KiB,
+# small enough for the tile to stay in L1/L2 while every qubit is updated
+MARGINAL_TILE = 4096
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _probabilities_numba(amplitudes, probabilities, num_qubits, num_chunks):
+        """
+        Fill probabilities with |amplitude|^2 and return each qubit's |1>
+        probability, reading every amplitude exactly once
+        """
+        num_states = amplitudes.shape[0]
+        chunk_size = (num_states + num_chunks - 1) // num_chunks
+        # Each chunk gets its own accumulator row so threads never share a sum
+        partial = np.zeros((num_chunks, num_qubits), dtype=probabilities.dtype)
+        for chunk in prange(num_chunks):
+            start = chunk * chunk_size
+            stop = min(start + chunk_size, num_states)
+            tile_sums = np.zeros(num_qubits, dtype=probabilities.dtype)
+            for tile_start in range(start, stop, MARGINAL_TILE):
+                tile_sums[:] = 0
+                for state_idx in range(tile_start, min(tile_start + MARGINAL_TILE, stop)):
+                    amplitude = amplitudes[state_idx]
+                    prob = amplitude.real * amplitude.real + amplitude.imag * amplitude.imag
+                    probabilities[state_idx] = prob
+                    for qubit_idx in range(num_qubits):
+                        if (state_idx >> qubit_idx) & 1:
+                            tile_sums[qubit_idx] += prob
+                partial[chunk] += tile_sums
+        return partial.sum(axis=0)
+
+# Numba's default workqueue threading layer rejects concurrent kernel
+# launches, and gthread workers may simulate from several threads at once
+_numba_lock = threading.Lock()
+
+# Bit matrices are cached per qubit count and dtype; above this size the
+# (n, 2**n) matrix gets too large and the tensor reduction is used instead
+BIT_MATRIX_MAX_QUBITS = 12
+_bit_matrices = {}
+
+def _bit_matrix(num_qubits, dtype):
+    """Return the cached (n, 2**n) matrix whose row k holds bit k of each basis index"""
+    key = (num_qubits, np.dtype(dtype))
+    bits = _bit_matrices.get(key)
+    if bits is None:
+        indices = np.arange(2**num_qubits, dtype=np.uint32)
+        shifts = np.arange(num_qubits, dtype=np.uint32)[:, None]
+        bits = ((indices[None, :] >> shifts) & 1).astype(dtype)
+        bits.flags.writeable = False
+        _bit_matrices[key] = bits
+    return bits
+
+def _measurement_probabilities(amplitudes, num_qubits):
+    """Return the basis-state probabilities and each qubit's |1> probability"""
+    if NUMBA_AVAILABLE and num_qubits > BIT_MATRIX_MAX_QUBITS:
+        probabilities = np.empty(amplitudes.shape[0], dtype=amplitudes.real.dtype)
+        with _numba_lock:
+            prob_1 = _probabilities_numba(
+                amplitudes, probabilities, num_qubits, get_num_threads()
+            )
+        return probabilities, prob_1
+    
+    probabilities = amplitudes.real * amplitudes.real + amplitudes.imag * amplitudes.imag
+    
+    if num_qubits <= BIT_MATRIX_MAX_QUBITS:
+        # One matrix-vector product reads the probabilities once for all qubits
+        return probabilities, _bit_matrix(num_qubits, probabilities.dtype) @ probabilities
+    
+    # Reshape the probabilities into a (2,)*n tensor and reduce over every
+    # axis except the one for the qubit. Qiskit is little-endian, so qubit k
+    # lives on axis n-1-k of the C-ordered tensor.
+    prob_tensor = probabilities.reshape([2] * num_qubits)
+    prob_1 = np.array([
+        prob_tensor.sum(axis=tuple(
+            axis for axis in range(num_qubits) if axis != num_qubits - 1 - qubit_idx
+        ))[1]
+        for qubit_idx in range(num_qubits)
+    ], dtype=probabilities.dtype)
+    return probabilities, prob_1
+
+# Simulation results are cached per worker, so their arrays count against
+# each worker's memory. Only circuits of up to CACHE_MAX_QUBITS qubits are
+# cached: a 14-qubit double-precision result holds about 384 KiB, which keeps
+# a full cache of RESULT_CACHE_SIZE entries under 48 MiB. Larger circuits are
+# simulated on every request.
+CACHE_MAX_QUBITS = int(os.getenv('CACHE_MAX_QUBITS', 14))
+RESULT_CACHE_SIZE = 128
+
+def _result_cache(simulate):
+    """
+    Like lru_cache for simulate(tree, precision, device), but called as
+    cached(key, tree, precision, device) with the key from _parse_circuit_code,
+    so a changed comment still hits, and only storing results whose first
+    field, the qubit count, is at most CACHE_MAX_QUBITS
+    """
+    results = OrderedDict()
+    lock = threading.Lock()
+    
+    @wraps(simulate)
+    def cached(code_key, tree, precision='single', device='auto'):
+        key = (code_key, precision, device)
+        with lock:
+            result = results.get(key)
+            if result is not None:
+                results.move_to_end(key)
+                return result
+        
+        result = simulate(tree, precision, device)
+        if result[0] <= CACHE_MAX_QUBITS:
+            with lock:
+                results[key] = result
+                if len(results) > RESULT_CACHE_SIZE:
+                    results.popitem(last=False)
+        return result
+    
+    return cached
+
+def _simulation_options(gpu_available):
+    """Read precision and device from the query string; return (precision, device, error)"""
+    precision = request.args.get('precision', 'single')
+    if precision not in AMPLITUDE_DTYPES:
+        return None, None, "precision must be 'single' or 'double'"
+    
+    device = request.args.get('device', 'auto')
+    if device not in DEVICES:
+        return None, None, "device must be 'auto', 'cpu' or 'gpu'"
+    if device == 'gpu' and not gpu_available:
+        return None, None, 'GPU simulation is not available on this server'
+    
+    return precision, device, None
+
+def _circuit_simulation(statevector_simulators, gpu_simulators, gpu_available):
+    """
+    Build a backend's cached simulate(key, tree, precision, device), taking
+    parsed code from _parse_circuit_code, over its Aer simulators, keyed by
+    precision
+    """
+    from qiskit import QuantumCircuit, transpile
+    
+    @_result_cache
+    def simulate(tree, precision='single', device='auto'):
+        """
+        Execute and simulate parsed Qiskit code, caching the result by normalized
+        source, precision and device
+        
+        Circuits are pure functions of their source, so repeated submissions
+        of the same code are served from the cache without re-running exec or
+        the simulation; circuits above CACHE_MAX_QUBITS are not cached.
+        Raises CircuitValidationError if the code does not define a
+        QuantumCircuit, otherwise returns a tuple of
+        (num_qubits, statevector, probabilities, marginal_probabilities,
+         circuit_depth, circuit_size).
+        """
+        # Create a safe execution environment
+        safe_globals = {
+            'QuantumCircuit': QuantumCircuit,
+            'np': np,
+            '__builtins__': {},
+        }
+        
+        safe_locals = {}
+        
+        # Execute the validated Qiskit code
+        exec(_compile_circuit_code(tree), safe_globals, safe_locals)
+        
+        # Find the circuit in the executed code. By convention it is named
+        # 'circ'; only scan the other locals if that name is not used.
+        # (An empty QuantumCircuit is falsy, so this cannot use `or`.)
+        circuit = safe_locals.get('circ')
+        if not isinstance(circuit, QuantumCircuit):
+            circuit = next(
+                (value for value in safe_locals.values() if isinstance(value, QuantumCircuit)),
+                None
+            )
+        
+        if circuit is None:
+            raise CircuitValidationError('No QuantumCircuit found in the provided code')
+        
+        # Get the number of qubits
+        num_qubits = circuit.num_qubits
+        
+        # Simulate using Aer's statevector method on a copy of the circuit so
+        # the save instruction does not show up in depth/size
+        sim_circuit = circuit.copy()
+        sim_circuit.save_statevector()
+        use_gpu = gpu_available and (
+            device == 'gpu' or (device == 'auto' and num_qubits >= GPU_THRESHOLD)
+        )
+        simulator = (gpu_simulators if use_gpu else statevector_simulators)[precision]
+        result = simulator.run(transpile(sim_circuit, simulator)).result()
+        final_state = result.get_statevector()
+        
+        # Qiskit hands the statevector back as complex128 even for single precision,
+        # so cast to the requested dtype and view the amplitudes as (real, imag)
+        # pairs; the arrays are serialized directly by orjson
+        amplitudes = np.ascontiguousarray(final_state.data, dtype=AMPLITUDE_DTYPES[precision])
+        statevector_data = amplitudes.view(amplitudes.real.dtype).reshape(-1, 2)
+        
+        # Calculate probabilities for each computational basis state and the
+        # marginal probabilities for individual qubits
+        probabilities, prob_1 = _measurement_probabilities(amplitudes, num_qubits)
+        # In single precision the subtraction can round a hair below zero
+        prob_0 = np.maximum(probabilities.sum() - prob_1, 0)
+        marginal_probabilities = [
+            {
+                'qubit': qubit_idx,
+                'prob_0': float(prob_0[qubit_idx]),
+                'prob_1': float(prob_1[qubit_idx])
+            }
+            for qubit_idx in range(num_qubits)
+        ]
+        
+        # Cached arrays are shared between requests
+        statevector_data.flags.writeable = False
+        probabilities.flags.writeable = False
+        
+        return (
+            num_qubits,
+            statevector_data,
+            probabilities,
+            tuple(marginal_probabilities),
+            circuit.depth(),
+            circuit.size()
+        )
+    
+    return simulate
+
+def _simulation_error(e, logger=None):
+    """Map an exception raised while simulating one circuit to (payload, status)"""
+    if isinstance(e, CircuitValidationError):
+        if logger:
+            logger.warning(f'Rejected circuit: {str(e)}')
+        return {'success': False, 'error': str(e)}, 400
+    
+    error_msg = f'Simulation error: {str(e)}'
+    if logger:
+        logger.error(error_msg)
+    return {'success': False, 'error': error_msg}, 500
+
+def _simulate_response(simulation_result, gpu_available, logger=None):
+    """
+    Answer a /simulate request, where simulation_result(qiskit_code,
+    precision, device) builds the backend's result payload
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'qiskit_code' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'Missing qiskit_code parameter'
+            }), 400
+        
+        precision, device, error = _simulation_options(gpu_available)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        
+        return _json(simulation_result(data['qiskit_code'], precision, device))
+        
+    except Exception as e:
+        payload, status = _simulation_error(e, logger)
+        # Formatting the traceback walks the whole stack, so only do it
+        # when someone is debugging
+        if status == 500 and current_app.debug:
+            payload['traceback'] = traceback.format_exc()
+        return jsonify(payload), status
+
+def _simulate_batch_response(simulation_result, gpu_available, logger=None):
+    """Answer a /simulate_batch request; see _simulate_response"""
+    data = request.get_json(silent=True)
+    circuits = data.get('circuits') if isinstance(data, dict) else None
+    if not isinstance(circuits, list) or not all(
+        isinstance(circuit, dict) and 'qiskit_code' in circuit for circuit in circuits
+    ):
+        return jsonify({
+            'success': False,
+            'error': 'circuits must be a list of objects with a qiskit_code field'
+        }), 400
+    if len(circuits) > MAX_BATCH_CIRCUITS:
+        return jsonify({
+            'success': False,
+            'error': f'A batch may contain at most {MAX_BATCH_CIRCUITS} circuits'
+        }), 400
+    
+    precision, device, error = _simulation_options(gpu_available)
+    if error:
+        return jsonify({
+            'success': False,
+            'error': error
+        }), 400
+    
+    results = []
+    for circuit in circuits:
+        try:
+            result = simulation_result(circuit['qiskit_code'], precision, device)
+        except Exception as e:
+            payload, status = _simulation_error(e, logger)
+            result = {
+                'success': False,
+                'status': status,
+                'error': payload['error']
+            }
+        if 'name' in circuit:
+            result = {'name': circuit['name'], **result}
+        results.append(result)
+    
+    return _json({'success': True, 'results': results})
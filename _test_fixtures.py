@@ -0,0 +1,76 @@
+"""
+Circuits and the response cache shared by the Quantum Visualizer 3D backend
+test scripts
+"""
+
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+Circuit = namedtuple("Circuit", "name code expected_qubits")
+
+BELL_STATE = Circuit("Bell State", '''# Bell State
+circ = QuantumCircuit(2)
+circ.h(0)
+circ.cx(0, 1)''', 2)
+
+GHZ_STATE = Circuit("GHZ State", '''# GHZ State
+circ = QuantumCircuit(3)
+circ.h(0)
+circ.cx(0, 1)
+circ.cx(0, 2)''', 3)
+
+SUPERPOSITION = Circuit("Superposition", '''# Superposition
+circ = QuantumCircuit(1)
+circ.h(0)''', 1)
+
+X_GATE = Circuit("X Gate", '''# X Gate
+circ = QuantumCircuit(1)
+circ.x(0)''', 1)
+
+# Circuits the Docker deployment test simulates, in step order
+TEST_CIRCUITS = (BELL_STATE, SUPERPOSITION)
+
+# Code the backends must reject with an error response
+INVALID_CODE = "invalid python code"
+
+# The test circuit whose round trip is reported as the response time
+TIMED_CIRCUIT = SUPERPOSITION.name
+
+# Responses that only change when the container is rebuilt are cached on disk
+# and revalidated with If-None-Match on every run, so each request still
+# reaches the backend; only the body is saved when it answers 304 Not
+# Modified. /health is never cached.
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "qv3d")
+
+def _cache_path(url):
+    return os.path.join(CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+def cache_lookup(url):
+    """Return the cached entry for url, or None"""
+    try:
+        with open(_cache_path(url)) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+def cache_store(url, etag, body):
+    """Write a response body to the cache; a read-only home just disables caching"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_cache_path(url), 'w') as cache_file:
+            json.dump({'etag': etag, 'body': body}, cache_file)
+    except OSError:
+        pass
+
+def revalidation_headers(entry):
+    return {'If-None-Match': entry['etag']} if entry and entry.get('etag') else {}
+
+def cache_update(url, entry, status, etag, data):
+    """Fold a conditional GET's reply into the cache; return (status code, body)"""
+    if status == 304 and entry:
+        return 200, entry['body']
+    if status == 200:
+        cache_store(url, etag, data)
+    return status, data
@@ -0,0 +1,47 @@
+"""
+pytest fixtures for the Quantum Visualizer 3D backend tests
+
+Set QV3D_BASE_URL to test a backend other than http://localhost:5000. When
+no backend is running there the tests that need one are skipped. The
+`backend` fixture instead drives quantum_backend's app in-process.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from _test_fixtures import BELL_STATE, GHZ_STATE, SUPERPOSITION, X_GATE
+
+BASE_URL = os.getenv("QV3D_BASE_URL", "http://localhost:5000")
+
+# Circuits simulated up front for the per-circuit tests
+SIMULATED_CIRCUITS = (BELL_STATE, GHZ_STATE, SUPERPOSITION, X_GATE)
+
+@pytest.fixture(scope="session")
+async def client():
+    """One HTTP client for the session; its first /health call also warms the backend"""
+    httpx = pytest.importorskip("httpx")
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=30) as client:
+        try:
+            await client.get("/health")
+        except httpx.TransportError:
+            pytest.skip(f"No backend running at {BASE_URL}")
+        yield client
+
+@pytest.fixture(scope="session")
+async def simulations(client):
+    """/simulate responses for every circuit in SIMULATED_CIRCUITS, requested concurrently"""
+    responses = await asyncio.gather(*(
+        client.post("/simulate", json={"qiskit_code": circuit.code})
+        for circuit in SIMULATED_CIRCUITS
+    ))
+    return {circuit.name: response for circuit, response in zip(SIMULATED_CIRCUITS, responses)}
+
+@pytest.fixture(scope="session")
+def backend():
+    """A Flask test client for quantum_backend, skipped without Qiskit Aer"""
+    pytest.importorskip("qiskit_aer")
+    import quantum_backend
+    
+    return quantum_backend.app.test_client()
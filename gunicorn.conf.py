@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for the Quantum Visualizer 3D backend
+
+Usage:
+    gunicorn -c gunicorn.conf.py quantum_backend:app
+"""
+
+import os
+
+# Bind to the same host/port variables the Flask entrypoints use
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', '5000')}"
+
+# Aer and the Numba kernel already spread one large simulation over every
+# core, so a couple of workers keep the CPU busy without oversubscribing it.
+# Each worker also holds its own copy of Qiskit (about 165 MiB resident once
+# the app is imported) plus up to about 48 MiB of cached results, so adding
+# workers mostly adds memory. Only cores this process may run on are counted,
+# not every core on the host.
+try:
+    usable_cpus = len(os.sched_getaffinity(0))
+except AttributeError:
+    usable_cpus = os.cpu_count() or 1
+workers = int(os.getenv('GUNICORN_WORKERS', min(2, usable_cpus)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Each worker imports the app itself. Preloading in the master is unsafe here:
+# building the canned results runs Aer jobs at import, and the thread Aer
+# runs jobs on does not survive fork, so every later simulation in a worker
+# would wait on it forever
+preload_app = False
+
+# Larger circuits can take a while to simulate
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+accesslog = '-'
+errorlog = '-'
@@ -1,15 +1,64 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS
-import numpy as np
-from qiskit import QuantumCircuit
-from qiskit.quantum_info import Statevector
+import orjson
 from qiskit_aer import AerSimulator
+import hashlib
 import json
-import traceback
+import os
+
+from _backend_common import (
+    AMPLITUDE_DTYPES, _circuit_simulation, _pack_statevector, _parse_circuit_code,
+    _simulate_batch_response, _simulate_response, _static_json
+)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Unity communication
 
+# The Flask debugger is opt-in; use gunicorn.conf.py for production serving
+DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+
+# Shared Aer statevector simulators, reused across requests
+STATEVECTOR_SIMULATORS = {
+    'single': AerSimulator(method='statevector', precision='single'),
+    'double': AerSimulator(method='statevector', precision='double')
+}
+# cuStateVec-backed GPU simulators, used when qiskit-aer-gpu finds a device
+GPU_AVAILABLE = 'GPU' in AerSimulator().available_devices()
+GPU_SIMULATORS = {
+    precision: AerSimulator(
+        method='statevector', device='GPU', precision=precision,
+        cuStateVec_enable=True
+    )
+    for precision in AMPLITUDE_DTYPES
+} if GPU_AVAILABLE else {}
+
+# Cached exec-and-simulate over the simulators above
+_simulate_cached = _circuit_simulation(STATEVECTOR_SIMULATORS, GPU_SIMULATORS, GPU_AVAILABLE)
+
+def _simulation_result(qiskit_code, precision, device):
+    """Simulate one circuit and build its /simulate response payload"""
+    # Example circuits are answered from precomputed results
+    code_key, tree = _parse_circuit_code(qiskit_code)
+    cached = CANNED_RESULTS.get((code_key, precision))
+    if cached is None:
+        cached = _simulate_cached(code_key, tree, precision, device)
+    
+    (num_qubits, statevector_data, probabilities, marginal_probabilities,
+     circuit_depth, circuit_size) = cached
+    
+    result = {
+        'success': True,
+        'statevector': statevector_data,
+        'num_qubits': num_qubits,
+        'probabilities': probabilities,
+        'marginal_probabilities': marginal_probabilities,
+        'circuit_depth': circuit_depth,
+        'circuit_size': circuit_size
+    }
+    if request.args.get('binary') == '1':
+        result = _pack_statevector(result)
+    return result
+
 @app.route('/simulate', methods=['POST'])
 def simulate_quantum_circuit():
     """
@@ -20,6 +69,11 @@ def simulate_quantum_circuit():
         "qiskit_code": "# Qiskit circuit code as string"
     }
     
+    Optional query parameter:
+        precision=single|double (default single, complex64 amplitudes)
+        device=auto|cpu|gpu (default auto, GPU for large circuits if present)
+        binary=1 (send statevector_b64/statevector_dtype instead of statevector)
+    
     Returns JSON:
     {
         "success": bool,
@@ -29,125 +83,52 @@ def simulate_quantum_circuit():
         "error": str (if success=False)
     }
     """
-    try:
-        data = request.get_json()
-        
-        if not data or 'qiskit_code' not in data:
-            return jsonify({
-                'success': False,
-                'error': 'Missing qiskit_code parameter'
-            }), 400
-        
-        qiskit_code = data['qiskit_code']
-        
-        # Create a safe execution environment
-        safe_globals = {
-            'QuantumCircuit': QuantumCircuit,
-            'np': np,
-            '__builtins__': {},
-        }
-        
-        safe_locals = {}
-        
-        # Execute the Qiskit code
-        exec(qiskit_code, safe_globals, safe_locals)
-        
-        # Find the circuit in the executed code
-        circuit = None
-        for var_name, var_value in safe_locals.items():
-            if isinstance(var_value, QuantumCircuit):
-                circuit = var_value
-                break
-        
-        if circuit is None:
-            return jsonify({
-                'success': False,
-                'error': 'No QuantumCircuit found in the provided code'
-            }), 400
-        
-        # Get the number of qubits
-        num_qubits = circuit.num_qubits
-        
-        # Simulate using statevector
-        initial_state = Statevector.from_int(0, 2**num_qubits)
-        final_state = initial_state.evolve(circuit)
-        
-        # Convert statevector to list format for JSON serialization
-        statevector_data = []
-        for amplitude in final_state.data:
-            statevector_data.append([float(amplitude.real), float(amplitude.imag)])
-        
-        # Calculate probabilities for each computational basis state
-        probabilities = [float(abs(amplitude)**2) for amplitude in final_state.data]
-        
-        # Calculate marginal probabilities for individual qubits
-        marginal_probabilities = []
-        for qubit_idx in range(num_qubits):
-            prob_0 = 0.0
-            prob_1 = 0.0
-            
-            for state_idx in range(2**num_qubits):
-                # Check if qubit_idx is 0 or 1 in this computational basis state
-                if (state_idx >> qubit_idx) & 1 == 0:
-                    prob_0 += probabilities[state_idx]
-                else:
-                    prob_1 += probabilities[state_idx]
-            
-            marginal_probabilities.append({
-                'qubit': qubit_idx,
-                'prob_0': float(prob_0),
-                'prob_1': float(prob_1)
-            })
-        
-        return jsonify({
-            'success': True,
-            'statevector': statevector_data,
-            'num_qubits': num_qubits,
-            'probabilities': probabilities,
-            'marginal_probabilities': marginal_probabilities,
-            'circuit_depth': circuit.depth(),
-            'circuit_size': circuit.size()
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': f'Simulation error: {str(e)}',
-            'traceback': traceback.format_exc()
-        }), 500
+    return _simulate_response(_simulation_result, GPU_AVAILABLE)
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'message': 'Quantum Visualizer 3D Backend is running'
-    })
+@app.route('/simulate_batch', methods=['POST'])
+def simulate_circuit_batch():
+    """
+    Simulate several circuits in one request
+    
+    Expected JSON input:
+    {
+        "circuits": [{"name": str (optional), "qiskit_code": str}, ...]
+    }
+    
+    Accepts the same query parameters as /simulate.
+    
+    Returns JSON:
+    {
+        "success": true,
+        "results": [/simulate result for each circuit, in order]
+    }
+    A circuit that fails gets success=False, an error and the status
+    /simulate would have answered with in its own result, without failing
+    the rest of the batch.
+    """
+    return _simulate_batch_response(_simulation_result, GPU_AVAILABLE)
 
-@app.route('/example_circuits', methods=['GET'])
-def get_example_circuits():
-    """Return example quantum circuits for testing"""
-    examples = {
-        'bell_state': '''# Bell State (Entanglement)
+EXAMPLE_CIRCUITS = {
+    'bell_state': '''# Bell State (Entanglement)
 circ = QuantumCircuit(2)
 circ.h(0)
 circ.cx(0, 1)''',
-        
-        'ghz_state': '''# GHZ State (3-qubit entanglement)
+
+    'ghz_state': '''# GHZ State (3-qubit entanglement)
 circ = QuantumCircuit(3)
 circ.h(0)
 circ.cx(0, 1)
 circ.cx(0, 2)''',
-        
-        'superposition': '''# Single qubit superposition
+
+    'superposition': '''# Single qubit superposition
 circ = QuantumCircuit(1)
 circ.h(0)''',
-        
-        'x_gate': '''# Simple X gate (bit flip)
+
+    'x_gate': '''# Simple X gate (bit flip)
 circ = QuantumCircuit(1)
 circ.x(0)''',
-        
-        'quantum_fourier_transform': '''# QFT on 3 qubits
+
+    'quantum_fourier_transform': '''# QFT on 3 qubits
 circ = QuantumCircuit(3)
 circ.h(0)
 circ.cp(np.pi/2, 0, 1)
@@ -156,18 +137,52 @@ circ.h(1)
 circ.cp(np.pi/2, 1, 2)
 circ.h(2)
 circ.swap(0, 2)'''
-    }
-    
-    return jsonify({
-        'success': True,
-        'examples': examples
-    })
+}
+
+# Precomputed results for the example circuits, keyed by normalized source
+# and precision, so the common requests skip exec and simulation entirely
+CANNED_RESULTS = {
+    (code_key, precision): _simulate_cached(code_key, tree, precision)
+    for code_key, tree in map(_parse_circuit_code, EXAMPLE_CIRCUITS.values())
+    for precision in AMPLITUDE_DTYPES
+}
+
+# Static responses are serialized once at import time
+_HEALTH_BYTES = orjson.dumps({
+    'status': 'healthy',
+    'message': 'Quantum Visualizer 3D Backend is running'
+})
+_EXAMPLES_BYTES = orjson.dumps({
+    'success': True,
+    'examples': EXAMPLE_CIRCUITS
+})
+_EXAMPLES_ETAG = hashlib.sha1(_EXAMPLES_BYTES).hexdigest()
+
+# The single event served on /events, once this worker has imported the app
+_READY_EVENT = b'event: ready\ndata: {"ready": true}\n\n'
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return Response(_HEALTH_BYTES, mimetype='application/json')
+
+@app.route('/events', methods=['GET'])
+def readiness_events():
+    """Server-sent readiness event"""
+    return Response(_READY_EVENT, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/example_circuits', methods=['GET'])
+def get_example_circuits():
+    """Return example quantum circuits for testing"""
+    return _static_json(_EXAMPLES_BYTES, _EXAMPLES_ETAG)
 
 if __name__ == '__main__':
     print("Starting Quantum Visualizer 3D Backend...")
     print("Available endpoints:")
     print("  POST /simulate - Simulate quantum circuits")
+    print("  POST /simulate_batch - Simulate several circuits in one request")
     print("  GET /health - Health check")
+    print("  GET /events - Readiness event stream")
     print("  GET /example_circuits - Get example circuits")
     print()
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=DEBUG)
\ No newline at end of file
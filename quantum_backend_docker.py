@@ -1,12 +1,17 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import numpy as np
+import orjson
+import hashlib
 import json
-import traceback
 import os
 import logging
 from datetime import datetime
 
+from _backend_common import (
+    AMPLITUDE_DTYPES, CircuitValidationError, _circuit_simulation, _json, _pack_statevector,
+    _parse_circuit_code, _simulate_batch_response, _simulate_response, _static_json
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,72 +29,42 @@ DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
 
 # Try to import Qiskit, fall back to simple simulation if not available
 try:
-    from qiskit import QuantumCircuit
-    from qiskit.quantum_info import Statevector
+    from qiskit_aer import AerSimulator
+    STATEVECTOR_SIMULATORS = {
+        'single': AerSimulator(method='statevector', precision='single'),
+        'double': AerSimulator(method='statevector', precision='double')
+    }
+    # cuStateVec-backed GPU simulators, used when qiskit-aer-gpu finds a device
+    GPU_AVAILABLE = 'GPU' in AerSimulator().available_devices()
+    GPU_SIMULATORS = {
+        precision: AerSimulator(
+            method='statevector', device='GPU', precision=precision,
+            cuStateVec_enable=True
+        )
+        for precision in AMPLITUDE_DTYPES
+    } if GPU_AVAILABLE else {}
     QISKIT_AVAILABLE = True
     logger.info("Qiskit is available - using full quantum simulation")
 except ImportError:
     QISKIT_AVAILABLE = False
+    GPU_AVAILABLE = False
     logger.warning("Qiskit not available - using simplified simulation")
 
-def simulate_with_qiskit(qiskit_code):
+if QISKIT_AVAILABLE:
+    # Cached exec-and-simulate over the simulators above
+    _simulate_cached = _circuit_simulation(STATEVECTOR_SIMULATORS, GPU_SIMULATORS, GPU_AVAILABLE)
+
+def simulate_with_qiskit(qiskit_code, precision='single', device='auto'):
     """Full Qiskit simulation"""
     try:
-        # Create a safe execution environment
-        safe_globals = {
-            'QuantumCircuit': QuantumCircuit,
-            'np': np,
-            '__builtins__': {},
-        }
-        
-        safe_locals = {}
-        
-        # Execute the Qiskit code
-        exec(qiskit_code, safe_globals, safe_locals)
-        
-        # Find the circuit in the executed code
-        circuit = None
-        for var_name, var_value in safe_locals.items():
-            if isinstance(var_value, QuantumCircuit):
-                circuit = var_value
-                break
+        # Example circuits are answered from precomputed results
+        code_key, tree = _parse_circuit_code(qiskit_code)
+        cached = CANNED_RESULTS.get((code_key, precision))
+        if cached is None:
+            cached = _simulate_cached(code_key, tree, precision, device)
         
-        if circuit is None:
-            raise ValueError('No QuantumCircuit found in the provided code')
-        
-        # Get the number of qubits
-        num_qubits = circuit.num_qubits
-        
-        # Simulate using statevector
-        initial_state = Statevector.from_int(0, 2**num_qubits)
-        final_state = initial_state.evolve(circuit)
-        
-        # Convert statevector to list format for JSON serialization
-        statevector_data = []
-        for amplitude in final_state.data:
-            statevector_data.append([float(amplitude.real), float(amplitude.imag)])
-        
-        # Calculate probabilities for each computational basis state
-        probabilities = [float(abs(amplitude)**2) for amplitude in final_state.data]
-        
-        # Calculate marginal probabilities for individual qubits
-        marginal_probabilities = []
-        for qubit_idx in range(num_qubits):
-            prob_0 = 0.0
-            prob_1 = 0.0
-            
-            for state_idx in range(2**num_qubits):
-                # Check if qubit_idx is 0 or 1 in this computational basis state
-                if (state_idx >> qubit_idx) & 1 == 0:
-                    prob_0 += probabilities[state_idx]
-                else:
-                    prob_1 += probabilities[state_idx]
-            
-            marginal_probabilities.append({
-                'qubit': qubit_idx,
-                'prob_0': float(prob_0),
-                'prob_1': float(prob_1)
-            })
+        (num_qubits, statevector_data, probabilities, marginal_probabilities,
+         circuit_depth, circuit_size) = cached
         
         return {
             'success': True,
@@ -97,11 +72,15 @@ def simulate_with_qiskit(qiskit_code):
             'num_qubits': num_qubits,
             'probabilities': probabilities,
             'marginal_probabilities': marginal_probabilities,
-            'circuit_depth': circuit.depth(),
-            'circuit_size': circuit.size(),
+            'circuit_depth': circuit_depth,
+            'circuit_size': circuit_size,
             'simulation_type': 'qiskit'
         }
         
+    except CircuitValidationError:
+        # Rejections are the client's error and are logged by the route
+        raise
+        
     except Exception as e:
         logger.error(f"Qiskit simulation error: {str(e)}")
         raise
@@ -126,6 +105,8 @@ def simulate_simple_circuit(qiskit_code):
             {"qubit": 1, "prob_0": 0.5, "prob_1": 0.5}
         ]
         circuit_type = "bell_state"
+        circuit_depth = 2
+        circuit_size = 2
     
     elif "ghz" in qiskit_code_lower or ("quantumcircuit(3)" in qiskit_code_lower and "cx(0, 2)" in qiskit_code_lower):
         # GHZ state: (|000⟩ + |111⟩)/√2
@@ -146,6 +127,8 @@ def simulate_simple_circuit(qiskit_code):
             {"qubit": 2, "prob_0": 0.5, "prob_1": 0.5}
         ]
         circuit_type = "ghz_state"
+        circuit_depth = 3
+        circuit_size = 3
     
     elif "h(0)" in qiskit_code_lower and "quantumcircuit(1)" in qiskit_code_lower:
         # Single qubit superposition: (|0⟩ + |1⟩)/√2
@@ -158,6 +141,8 @@ def simulate_simple_circuit(qiskit_code):
             {"qubit": 0, "prob_0": 0.5, "prob_1": 0.5}
         ]
         circuit_type = "superposition"
+        circuit_depth = 1
+        circuit_size = 1
     
     elif "x(0)" in qiskit_code_lower:
         # X gate: |1⟩
@@ -170,6 +155,8 @@ def simulate_simple_circuit(qiskit_code):
             {"qubit": 0, "prob_0": 0.0, "prob_1": 1.0}
         ]
         circuit_type = "x_gate"
+        circuit_depth = 1
+        circuit_size = 1
     
     else:
         # Default to |0...0⟩ state
@@ -179,6 +166,8 @@ def simulate_simple_circuit(qiskit_code):
             {"qubit": i, "prob_0": 1.0, "prob_1": 0.0} for i in range(num_qubits)
         ]
         circuit_type = "default"
+        circuit_depth = 0
+        circuit_size = 0
     
     # Calculate probabilities from statevector
     probabilities = [sv[0]**2 + sv[1]**2 for sv in statevector]
@@ -189,98 +178,119 @@ def simulate_simple_circuit(qiskit_code):
         'num_qubits': num_qubits,
         'probabilities': probabilities,
         'marginal_probabilities': marginal_probabilities,
-        'circuit_depth': 2,
-        'circuit_size': 2,
+        'circuit_depth': circuit_depth,
+        'circuit_size': circuit_size,
         'simulation_type': 'simple',
         'circuit_type': circuit_type
     }
 
+def _simulation_result(qiskit_code, precision, device):
+    """Simulate one circuit and build its response payload"""
+    logger.info(f"Simulating circuit: {qiskit_code[:100]}...")
+    
+    if QISKIT_AVAILABLE:
+        result = simulate_with_qiskit(qiskit_code, precision, device)
+    else:
+        result = simulate_simple_circuit(qiskit_code)
+    
+    logger.info(f"Simulation successful: {result.get('num_qubits')} qubits, type: {result.get('simulation_type')}")
+    if request.args.get('binary') == '1':
+        result = _pack_statevector(result)
+    return result
+
 @app.route('/simulate', methods=['POST'])
 def simulate_quantum_circuit():
     """API endpoint to simulate quantum circuits"""
-    try:
-        data = request.get_json()
-        
-        if not data or 'qiskit_code' not in data:
-            return jsonify({
-                'success': False,
-                'error': 'Missing qiskit_code parameter'
-            }), 400
-        
-        qiskit_code = data['qiskit_code']
-        logger.info(f"Simulating circuit: {qiskit_code[:100]}...")
-        
-        if QISKIT_AVAILABLE:
-            result = simulate_with_qiskit(qiskit_code)
-        else:
-            result = simulate_simple_circuit(qiskit_code)
-        
-        logger.info(f"Simulation successful: {result.get('num_qubits')} qubits, type: {result.get('simulation_type')}")
-        return jsonify(result)
-        
-    except Exception as e:
-        error_msg = f'Simulation error: {str(e)}'
-        logger.error(error_msg)
-        return jsonify({
-            'success': False,
-            'error': error_msg,
-            'traceback': traceback.format_exc()
-        }), 500
+    return _simulate_response(_simulation_result, GPU_AVAILABLE, logger)
+
+@app.route('/simulate_batch', methods=['POST'])
+def simulate_circuit_batch():
+    """
+    Simulate several circuits in one request
+    
+    Expects {"circuits": [{"name": str (optional), "qiskit_code": str}, ...]}
+    and accepts the same query parameters as /simulate. Returns
+    {"success": true, "results": [...]} with one /simulate result per
+    circuit, in order; a circuit that fails gets success=False, an error and
+    the status /simulate would have answered with in its own result, without
+    failing the rest of the batch.
+    """
+    return _simulate_batch_response(_simulation_result, GPU_AVAILABLE, logger)
+
+# Static health fields; only the timestamp is computed per request
+_HEALTH_FIELDS = {
+    'status': 'healthy',
+    'message': 'Quantum Visualizer 3D Backend is running',
+    'qiskit_available': QISKIT_AVAILABLE,
+    'version': '1.0.0',
+    'environment': 'docker'
+}
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'message': 'Quantum Visualizer 3D Backend is running',
-        'timestamp': datetime.utcnow().isoformat(),
-        'qiskit_available': QISKIT_AVAILABLE,
-        'version': '1.0.0',
-        'environment': 'docker'
+    # Flask answers HEAD through this view; readiness probes only read the status
+    if request.method == 'HEAD':
+        return Response(mimetype='application/json')
+    return _json({
+        **_HEALTH_FIELDS,
+        'timestamp': datetime.utcnow().isoformat()
     })
 
+# Readiness is pushed as one server-sent event. A worker only accepts
+# connections once it has imported the app, so a client that opens /events
+# while the container is starting is answered as soon as the backend can serve
+_READY_EVENT = b'event: ready\ndata: {"ready": true}\n\n'
+
+@app.route('/events', methods=['GET'])
+def readiness_events():
+    """Server-sent readiness event"""
+    return Response(_READY_EVENT, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+# System info is fixed for the life of the process, so it is serialized once
+_INFO_BYTES = orjson.dumps({
+    'success': True,
+    'system_info': {
+        'qiskit_available': QISKIT_AVAILABLE,
+        'python_version': f"{os.sys.version_info.major}.{os.sys.version_info.minor}.{os.sys.version_info.micro}",
+        'flask_version': getattr(__import__('flask'), '__version__', 'unknown'),
+        'numpy_available': True,
+        'gpu_available': GPU_AVAILABLE,
+        'container': True,
+        'host': HOST,
+        'port': PORT
+    }
+})
+_INFO_ETAG = hashlib.sha1(_INFO_BYTES).hexdigest()
+
 @app.route('/info', methods=['GET'])
 def get_info():
     """Get system information"""
-    return jsonify({
-        'success': True,
-        'system_info': {
-            'qiskit_available': QISKIT_AVAILABLE,
-            'python_version': f"{os.sys.version_info.major}.{os.sys.version_info.minor}.{os.sys.version_info.micro}",
-            'flask_version': getattr(__import__('flask'), '__version__', 'unknown'),
-            'numpy_available': True,
-            'container': True,
-            'host': HOST,
-            'port': PORT
-        }
-    })
+    return _static_json(_INFO_BYTES, _INFO_ETAG)
 
-@app.route('/example_circuits', methods=['GET'])
-def get_example_circuits():
-    """Return example quantum circuits for testing"""
-    examples = {
-        'bell_state': '''# Bell State (Entanglement)
+EXAMPLE_CIRCUITS = {
+    'bell_state': '''# Bell State (Entanglement)
 circ = QuantumCircuit(2)
 circ.h(0)
 circ.cx(0, 1)''',
-        
-        'ghz_state': '''# GHZ State (3-qubit entanglement)
+
+    'ghz_state': '''# GHZ State (3-qubit entanglement)
 circ = QuantumCircuit(3)
 circ.h(0)
 circ.cx(0, 1)
 circ.cx(0, 2)''',
-        
-        'superposition': '''# Single qubit superposition
+
+    'superposition': '''# Single qubit superposition
 circ = QuantumCircuit(1)
 circ.h(0)''',
-        
-        'x_gate': '''# Simple X gate (bit flip)
+
+    'x_gate': '''# Simple X gate (bit flip)
 circ = QuantumCircuit(1)
 circ.x(0)'''
-    }
-    
-    if QISKIT_AVAILABLE:
-        examples['quantum_fourier_transform'] = '''# QFT on 3 qubits
+}
+
+if QISKIT_AVAILABLE:
+    EXAMPLE_CIRCUITS['quantum_fourier_transform'] = '''# QFT on 3 qubits
 import numpy as np
 circ = QuantumCircuit(3)
 circ.h(0)
@@ -290,12 +300,27 @@ circ.h(1)
 circ.cp(np.pi/2, 1, 2)
 circ.h(2)
 circ.swap(0, 2)'''
-    
-    return jsonify({
-        'success': True,
-        'examples': examples,
-        'qiskit_available': QISKIT_AVAILABLE
-    })
+
+# Precomputed results for the example circuits, keyed by normalized source
+# and precision, so the common requests skip exec and simulation entirely
+CANNED_RESULTS = {
+    (code_key, precision): _simulate_cached(code_key, tree, precision)
+    for code_key, tree in map(_parse_circuit_code, EXAMPLE_CIRCUITS.values())
+    for precision in AMPLITUDE_DTYPES
+} if QISKIT_AVAILABLE else {}
+
+# The examples response is serialized once at import time
+_EXAMPLES_BYTES = orjson.dumps({
+    'success': True,
+    'examples': EXAMPLE_CIRCUITS,
+    'qiskit_available': QISKIT_AVAILABLE
+})
+_EXAMPLES_ETAG = hashlib.sha1(_EXAMPLES_BYTES).hexdigest()
+
+@app.route('/example_circuits', methods=['GET'])
+def get_example_circuits():
+    """Return example quantum circuits for testing"""
+    return _static_json(_EXAMPLES_BYTES, _EXAMPLES_ETAG)
 
 @app.errorhandler(404)
 def not_found(error):
@@ -304,9 +329,11 @@ def not_found(error):
         'error': 'Endpoint not found',
         'available_endpoints': [
             'GET /health',
+            'GET /events',
             'GET /info', 
             'GET /example_circuits',
-            'POST /simulate'
+            'POST /simulate',
+            'POST /simulate_batch'
         ]
     }), 404
 
@@ -323,7 +350,9 @@ if __name__ == '__main__':
     logger.info(f"Qiskit available: {QISKIT_AVAILABLE}")
     logger.info("Available endpoints:")
     logger.info("  POST /simulate - Simulate quantum circuits")
+    logger.info("  POST /simulate_batch - Simulate several circuits in one request")
     logger.info("  GET /health - Health check")
+    logger.info("  GET /events - Readiness event stream")
     logger.info("  GET /info - System information")
     logger.info("  GET /example_circuits - Get example circuits")
     logger.info(f"Starting server on {HOST}:{PORT}")
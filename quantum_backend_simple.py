@@ -1,13 +1,20 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import numpy as np
+import orjson
+import hashlib
 import json
 import traceback
+import os
 import math
+import re
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Unity communication
 
+# The Flask debugger is opt-in; use gunicorn.conf.py for production serving
+DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+
 def simulate_simple_circuit(circuit_type, num_qubits=2):
     """
     Simple quantum circuit simulation without Qiskit dependency
@@ -27,6 +34,8 @@ def simulate_simple_circuit(circuit_type, num_qubits=2):
             {"qubit": 0, "prob_0": 0.5, "prob_1": 0.5},
             {"qubit": 1, "prob_0": 0.5, "prob_1": 0.5}
         ]
+        circuit_depth = 2
+        circuit_size = 2
     
     elif circuit_type == "ghz_state":
         # GHZ state: (|000⟩ + |111⟩)/√2
@@ -46,6 +55,8 @@ def simulate_simple_circuit(circuit_type, num_qubits=2):
             {"qubit": 1, "prob_0": 0.5, "prob_1": 0.5},
             {"qubit": 2, "prob_0": 0.5, "prob_1": 0.5}
         ]
+        circuit_depth = 3
+        circuit_size = 3
     
     elif circuit_type == "superposition":
         # Single qubit superposition: (|0⟩ + |1⟩)/√2
@@ -57,6 +68,8 @@ def simulate_simple_circuit(circuit_type, num_qubits=2):
         marginal_probabilities = [
             {"qubit": 0, "prob_0": 0.5, "prob_1": 0.5}
         ]
+        circuit_depth = 1
+        circuit_size = 1
     
     elif circuit_type == "x_gate":
         # X gate: |1⟩
@@ -68,6 +81,8 @@ def simulate_simple_circuit(circuit_type, num_qubits=2):
         marginal_probabilities = [
             {"qubit": 0, "prob_0": 0.0, "prob_1": 1.0}
         ]
+        circuit_depth = 1
+        circuit_size = 1
     
     else:
         # Default to |0...0⟩ state
@@ -76,6 +91,8 @@ def simulate_simple_circuit(circuit_type, num_qubits=2):
         marginal_probabilities = [
             {"qubit": i, "prob_0": 1.0, "prob_1": 0.0} for i in range(num_qubits)
         ]
+        circuit_depth = 0
+        circuit_size = 0
     
     # Calculate probabilities from statevector
     probabilities = [sv[0]**2 + sv[1]**2 for sv in statevector]
@@ -86,10 +103,37 @@ def simulate_simple_circuit(circuit_type, num_qubits=2):
         "num_qubits": num_qubits,
         "probabilities": probabilities,
         "marginal_probabilities": marginal_probabilities,
-        "circuit_depth": 2,
-        "circuit_size": 2
+        "circuit_depth": circuit_depth,
+        "circuit_size": circuit_size
     }
 
+# Keywords that identify the demo circuits, found in a single scan of the code
+CIRCUIT_KEYWORDS = re.compile('|'.join(re.escape(keyword) for keyword in (
+    'ghz', 'bell',
+    'quantumcircuit(1)', 'quantumcircuit(2)', 'quantumcircuit(3)',
+    'h(0)', 'x(0)', 'cx(0, 1)', 'cx(0, 2)'
+)))
+
+def classify_circuit(qiskit_code):
+    """Simple pattern matching to determine circuit type"""
+    found = set(CIRCUIT_KEYWORDS.findall(qiskit_code.lower()))
+    
+    if 'ghz' in found or {'quantumcircuit(3)', 'cx(0, 2)'} <= found:
+        return "ghz_state"
+    if 'bell' in found or {'quantumcircuit(2)', 'h(0)', 'cx(0, 1)'} <= found:
+        return "bell_state"
+    if {'h(0)', 'quantumcircuit(1)'} <= found:
+        return "superposition"
+    if 'x(0)' in found:
+        return "x_gate"
+    return "default"
+
+# The demo results never change, so each response is serialized once
+SIMULATION_RESPONSES = {
+    circuit_type: orjson.dumps(simulate_simple_circuit(circuit_type))
+    for circuit_type in ("bell_state", "ghz_state", "superposition", "x_gate", "default")
+}
+
 @app.route('/simulate', methods=['POST'])
 def simulate_quantum_circuit():
     """
@@ -104,67 +148,78 @@ def simulate_quantum_circuit():
                 'error': 'Missing qiskit_code parameter'
             }), 400
         
-        qiskit_code = data['qiskit_code'].lower()
+        circuit_type = classify_circuit(data['qiskit_code'])
         
-        # Simple pattern matching to determine circuit type
-        if "ghz" in qiskit_code or ("quantumcircuit(3)" in qiskit_code and "cx(0, 2)" in qiskit_code):
-            result = simulate_simple_circuit("ghz_state")
-        elif "bell" in qiskit_code or ("quantumcircuit(2)" in qiskit_code and "h(0)" in qiskit_code and "cx(0, 1)" in qiskit_code):
-            result = simulate_simple_circuit("bell_state")
-        elif "h(0)" in qiskit_code and "quantumcircuit(1)" in qiskit_code:
-            result = simulate_simple_circuit("superposition")
-        elif "x(0)" in qiskit_code:
-            result = simulate_simple_circuit("x_gate")
-        else:
-            result = simulate_simple_circuit("default")
-        
-        return jsonify(result)
+        return Response(SIMULATION_RESPONSES[circuit_type], mimetype='application/json')
         
     except Exception as e:
-        return jsonify({
+        payload = {
             'success': False,
-            'error': f'Simulation error: {str(e)}',
-            'traceback': traceback.format_exc()
-        }), 500
+            'error': f'Simulation error: {str(e)}'
+        }
+        # Formatting the traceback walks the whole stack, so only do it
+        # when someone is debugging
+        if app.debug:
+            payload['traceback'] = traceback.format_exc()
+        return jsonify(payload), 500
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'message': 'Quantum Visualizer 3D Backend (Simple Version) is running',
-        'note': 'This is a demonstration version without full Qiskit integration'
-    })
-
-@app.route('/example_circuits', methods=['GET'])
-def get_example_circuits():
-    """Return example quantum circuits for testing"""
-    examples = {
-        'bell_state': '''# Bell State (Entanglement)
+EXAMPLE_CIRCUITS = {
+    'bell_state': '''# Bell State (Entanglement)
 circ = QuantumCircuit(2)
 circ.h(0)
 circ.cx(0, 1)''',
-        
-        'ghz_state': '''# GHZ State (3-qubit entanglement)
+
+    'ghz_state': '''# GHZ State (3-qubit entanglement)
 circ = QuantumCircuit(3)
 circ.h(0)
 circ.cx(0, 1)
 circ.cx(0, 2)''',
-        
-        'superposition': '''# Single qubit superposition
+
+    'superposition': '''# Single qubit superposition
 circ = QuantumCircuit(1)
 circ.h(0)''',
-        
-        'x_gate': '''# Simple X gate (bit flip)
+
+    'x_gate': '''# Simple X gate (bit flip)
 circ = QuantumCircuit(1)
 circ.x(0)'''
-    }
-    
-    return jsonify({
-        'success': True,
-        'examples': examples,
-        'note': 'Simple demonstration circuits'
-    })
+}
+
+def _static_json(body, etag):
+    """Serve prebuilt JSON bytes, answering a matching If-None-Match with 304"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+# Static responses are serialized once at import time
+_HEALTH_BYTES = orjson.dumps({
+    'status': 'healthy',
+    'message': 'Quantum Visualizer 3D Backend (Simple Version) is running',
+    'note': 'This is a demonstration version without full Qiskit integration'
+})
+_EXAMPLES_BYTES = orjson.dumps({
+    'success': True,
+    'examples': EXAMPLE_CIRCUITS,
+    'note': 'Simple demonstration circuits'
+})
+_EXAMPLES_ETAG = hashlib.sha1(_EXAMPLES_BYTES).hexdigest()
+
+# The single event served on /events, once this worker has imported the app
+_READY_EVENT = b'event: ready\ndata: {"ready": true}\n\n'
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return Response(_HEALTH_BYTES, mimetype='application/json')
+
+@app.route('/events', methods=['GET'])
+def readiness_events():
+    """Server-sent readiness event"""
+    return Response(_READY_EVENT, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/example_circuits', methods=['GET'])
+def get_example_circuits():
+    """Return example quantum circuits for testing"""
+    return _static_json(_EXAMPLES_BYTES, _EXAMPLES_ETAG)
 
 if __name__ == '__main__':
     print("Starting Quantum Visualizer 3D Backend (Simple Version)...")
@@ -172,6 +227,7 @@ if __name__ == '__main__':
     print("Available endpoints:")
     print("  POST /simulate - Simulate quantum circuits (pattern matching)")
     print("  GET /health - Health check")
+    print("  GET /events - Readiness event stream")
     print("  GET /example_circuits - Get example circuits")
     print()
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=DEBUG)
\ No newline at end of file
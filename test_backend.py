@@ -167,5 +167,8 @@ circ.h(0)'''
     
     return True
 
+# A script run against a live backend, not a pytest test
+test_backend.__test__ = False
+
 if __name__ == "__main__":
     test_backend()
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Tests for the ?binary=1 statevector encoding
+
+These run in-process and need no backend server.
+"""
+
+import base64
+
+import numpy as np
+import pytest
+
+# Entangled, with complex amplitudes, so both halves of each pair are checked
+CIRCUIT_CODE = "circ = QuantumCircuit(2)\ncirc.h(0)\ncirc.rx(0.3, 1)\ncirc.cp(np.pi / 3, 0, 1)"
+
+# The advertised statevector_dtype for each precision, as a NumPy dtype
+PACKED_DTYPES = {
+    'single': ('complex64_le', '<c8'),
+    'double': ('complex128_le', '<c16'),
+}
+
+@pytest.mark.parametrize("precision", PACKED_DTYPES)
+def test_binary_statevector_matches_list_form(backend, precision):
+    listed = backend.post(f"/simulate?precision={precision}", json={"qiskit_code": CIRCUIT_CODE}).get_json()
+    packed = backend.post(
+        f"/simulate?precision={precision}&binary=1", json={"qiskit_code": CIRCUIT_CODE}
+    ).get_json()
+    
+    advertised, dtype = PACKED_DTYPES[precision]
+    assert packed['statevector_dtype'] == advertised
+    assert 'statevector' not in packed
+    
+    amplitudes = np.frombuffer(base64.b64decode(packed['statevector_b64']), dtype=dtype)
+    expected = np.array(listed['statevector'], dtype=amplitudes.real.dtype)
+    np.testing.assert_array_equal(np.stack([amplitudes.real, amplitudes.imag], axis=-1), expected)
+    assert np.count_nonzero(amplitudes.imag) > 0
@@ -0,0 +1,94 @@
+"""
+Tests for the allow-list that submitted circuit code is checked against, and
+for the normalization that matches it to the precomputed example results
+
+These run in-process and need no backend server.
+"""
+
+import ast
+
+import pytest
+
+from _backend_common import CircuitValidationError, _compile_circuit_code, _parse_circuit_code
+
+ACCEPTED_CODE = (
+    "circ = QuantumCircuit(2)\ncirc.h(0)\ncirc.cx(0, 1)",
+    "import numpy as np\ncirc = QuantumCircuit(1)\ncirc.rz(np.pi / 2, 0)",
+    "circ = QuantumCircuit(2)\ncirc.cp(-np.pi / 4, 0, 1)\ncirc.ry(np.sqrt(2) * 0.5, 1)",
+    "circ = QuantumCircuit(3)\ncirc.barrier([0, 1, 2])",
+    "# Bell state\nqc = QuantumCircuit(2)\nqc.h(0)  # superposition\nqc.cx(0, 1)",
+)
+
+REJECTED_CODE = (
+    "import os",
+    "import numpy",
+    "import numpy as numpy",
+    "import numpy as np, os",
+    "from numpy import pi",
+    "circ = QuantumCircuit(1)\ncirc.h(0).c_if(0, 1)",
+    "circ = QuantumCircuit(1)\ncirc.__class__.__init__(circ)",
+    "circ = QuantumCircuit(1)\ncirc.draw()",
+    "circ = QuantumCircuit(1)\nnp.random.seed(0)",
+    "circ = QuantumCircuit(1)\ncirc.rx(np.random.rand(), 0)",
+    "circ = QuantumCircuit(1)\ncirc.h('0')",
+    "circ = QuantumCircuit(1)\ncirc.h(True)",
+    "circ = QuantumCircuit(1)\ncirc.rx(x, 0)",
+    "circ = QuantumCircuit(1)\ncirc.rx(2 ** 1000, 0)",
+    "circ = QuantumCircuit(1)\ncirc.h(qubit=0)",
+    "circ = QuantumCircuit(n)",
+    "circ = QuantumCircuit(1)\nother.h(0)",
+    "x = 1",
+    "invalid python code",
+)
+
+def compile_code(code):
+    """Parse and validate code the way the backends do"""
+    _, tree = _parse_circuit_code(code)
+    return _compile_circuit_code(tree)
+
+@pytest.mark.parametrize("code", ACCEPTED_CODE)
+def test_accepts_circuit_code(code):
+    assert compile_code(code) is not None
+
+@pytest.mark.parametrize("code", REJECTED_CODE)
+def test_rejects_other_code(code):
+    with pytest.raises(CircuitValidationError):
+        compile_code(code)
+
+def test_normalization_ignores_comments_and_formatting():
+    key, _ = _parse_circuit_code("# Bell state\ncirc = QuantumCircuit( 2 )\n\ncirc.h(0)  # H\ncirc.cx(0,1)")
+    assert key == _parse_circuit_code("circ = QuantumCircuit(2)\ncirc.h(0)\ncirc.cx(0, 1)")[0]
+
+def test_validation_leaves_the_parsed_tree_intact():
+    key, tree = _parse_circuit_code("import numpy as np\ncirc = QuantumCircuit(1)\ncirc.h(0)")
+    _compile_circuit_code(tree)
+    assert ast.dump(tree) == key
+
+@pytest.mark.parametrize("code", (
+    "circ = Quantum Circuit(2)\ncirc.h(0)\ncirc.cx(0, 1)",
+    "circ = QuantumCircuit(2) circ.h(0) circ.cx(0, 1)",
+))
+def test_normalization_rejects_code_that_does_not_parse(code):
+    with pytest.raises(CircuitValidationError, match="Invalid syntax on line 1"):
+        _parse_circuit_code(code)
+
+@pytest.mark.parametrize("code", (
+    "x = 1",
+    "import os",
+    "invalid python code",
+    "circ = QuantumCircuit(2) circ.h(0) circ.cx(0, 1)",
+))
+def test_rejected_code_is_a_bad_request(backend, code):
+    response = backend.post("/simulate", json={"qiskit_code": code})
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+
+def test_rejected_batch_entry_is_a_bad_request(backend):
+    response = backend.post("/simulate_batch", json={"circuits": [
+        {"qiskit_code": "circ = QuantumCircuit(1)\ncirc.h(0)"},
+        {"qiskit_code": "x = 1"},
+    ]})
+    assert response.status_code == 200
+    accepted, rejected = response.get_json()['results']
+    assert accepted['success']
+    assert not rejected['success'] and rejected['status'] == 400
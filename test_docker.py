@@ -3,35 +3,568 @@
 Docker deployment test script for Quantum Visualizer 3D
 """
 
-import requests
+import asyncio
+import dataclasses
+import importlib.util
 import json
 import time
 import sys
-import os
+from typing import Optional
 
-def test_docker_deployment(base_url="http://localhost:5000", timeout=60):
+from _test_fixtures import (
+    TEST_CIRCUITS, INVALID_CODE, TIMED_CIRCUIT, cache_lookup, cache_update, revalidation_headers
+)
+
+# httpx is optional; without it every request is issued serially through requests.
+# It is only imported once the concurrent path runs.
+HTTPX_AVAILABLE = importlib.util.find_spec("httpx") is not None
+
+# With h2 installed httpx negotiates HTTP/2 on https URLs (e.g. behind a TLS
+# proxy), and the concurrent probes share one multiplexed connection
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# msgspec is optional; without it replies are decoded with json and then
+# copied into the reply models
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+# One pooled session keeps connections alive across the blocking path's requests. It is
+# built on first use, so importing this module does not load requests.
+_session = None
+
+def get_session():
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+    return _session
+
+# Readiness probes back off exponentially while the container is unreachable
+INITIAL_POLL_DELAY = 0.25
+MAX_POLL_DELAY = 10
+
+ERROR_PAYLOAD = {"qiskit_code": INVALID_CODE}
+
+# Steps 5 and 6 as a single /simulate_batch request, in step order
+BATCH_PAYLOAD = {"circuits": [
+    {"name": test_circuit.name, "qiskit_code": test_circuit.code}
+    for test_circuit in TEST_CIRCUITS
+] + [
+    {"name": "Error Handling", **ERROR_PAYLOAD},
+]}
+
+# A batch is timed as a whole, so its round trip is reported under this label
+# rather than as TIMED_CIRCUIT's
+BATCH_TIMING = f"/simulate_batch, {len(BATCH_PAYLOAD['circuits'])} circuits"
+
+def split_batch_reply(reply):
+    """
+    Turn a /simulate_batch reply into per-circuit replies shaped like /simulate's.
+    Returns (test circuit replies, error reply).
+    """
+    num_circuits = len(BATCH_PAYLOAD["circuits"])
+    if isinstance(reply, Exception) or reply[0] != 200:
+        # A failed batch fails every step that depended on it
+        entries = [reply] * num_circuits
+    elif reply[1] is None or len(reply[1].results) != num_circuits:
+        # So does a 200 whose body is not one result per circuit
+        entries = [ValueError("/simulate_batch did not return one result per circuit")] * num_circuits
+    else:
+        # A failed entry carries the status /simulate would have answered with
+        entries = [
+            (200 if result.success else result.status or 400, result)
+            for result in reply[1].results
+        ]
+    *simulations, error = entries
+    return simulations, error
+
+@dataclasses.dataclass
+class HealthReply:
+    """The /health fields the report prints"""
+    status: Optional[str] = None
+    environment: Optional[str] = None
+    qiskit_available: Optional[bool] = None
+    version: Optional[str] = None
+
+@dataclasses.dataclass
+class SimulationReply:
+    """One simulation result, with the statevector reduced to its length"""
+    name: Optional[str] = None
+    success: bool = False
+    num_qubits: Optional[int] = None
+    simulation_type: str = 'unknown'
+    error: Optional[str] = None
+    status: Optional[int] = None
+    num_states: int = 0
+    statevector: Optional[list] = None
+    
+    def __post_init__(self):
+        # The statevector is only read off the wire to be counted
+        if self.statevector is not None:
+            self.num_states = len(self.statevector)
+            self.statevector = None
+
+@dataclasses.dataclass
+class BatchReply:
+    """A /simulate_batch reply"""
+    results: list[SimulationReply] = dataclasses.field(default_factory=list)
+    
+    def __post_init__(self):
+        self.results = [
+            result if isinstance(result, SimulationReply) else _from_dict(SimulationReply, result)
+            for result in self.results
+        ]
+
+def _from_dict(model, data):
+    """Build a reply model from decoded JSON, dropping the fields it doesn't declare"""
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a JSON object for {model.__name__}")
+    names = {field.name for field in dataclasses.fields(model)}
+    return model(**{key: value for key, value in data.items() if key in names})
+
+def decode_reply(body, model=None):
+    """
+    Decode a JSON body, into `model` when one is given. With msgspec the model is
+    filled straight from the bytes and undeclared fields are never built.
+    Returns None if the body is not valid for it.
+    """
+    try:
+        if MSGSPEC_AVAILABLE:
+            return msgspec.json.decode(body, type=model) if model else msgspec.json.decode(body)
+        data = json.loads(body)
+        return _from_dict(model, data) if model else data
+    except (ValueError, TypeError):
+        return None
+
+def batch_supported(reply):
+    """A HEAD on /simulate_batch is 405 where the route exists, 404 where it doesn't"""
+    return not isinstance(reply, Exception) and reply[0] != 404
+
+# Readiness polls only need the status code, so they ask for headers alone.
+# A server that rejects HEAD is polled with GET from then on.
+READINESS_METHOD = 'HEAD'
+
+def next_readiness_method(method, status):
+    return 'GET' if method == 'HEAD' and status == 405 else method
+
+def next_poll_delay(delay, server_up):
+    """Double the delay after a failed connection; keep it while the server is answering"""
+    return delay if server_up else min(delay * 2, MAX_POLL_DELAY)
+
+def events_unsupported(status, content_type):
+    """/events answered, but not with a readiness stream; server errors are retried instead"""
+    return status < 500 and not (status == 200 and content_type.startswith('text/event-stream'))
+
+def is_ready_event(line):
+    field, _, value = line.partition(':')
+    return field == 'event' and value.strip() == 'ready'
+
+async def ready_event_async(client, timeout):
+    """
+    Open /events and wait up to `timeout` for the ready event. Returns True once it
+    arrives, False if the server answered without it, or None if it has no stream.
+    """
+    import httpx
+    
+    # Until a worker is up the request waits in the server's accept queue, so
+    # only the connect is bounded tightly
+    async with client.stream('GET', "/events", timeout=httpx.Timeout(2, read=timeout)) as response:
+        if events_unsupported(response.status_code, response.headers.get('Content-Type', '')):
+            return None
+        async for line in response.aiter_lines():
+            if is_ready_event(line):
+                return True
+    return False
+
+async def wait_for_container_async(client, timeout):
+    """
+    Wait for the backend's ready event; return the seconds waited, or None on timeout.
+    Servers without /events are polled on /health instead.
+    """
+    import httpx
+    
+    start_time = time.monotonic()
+    delay = INITIAL_POLL_DELAY
+    while (remaining := timeout - (time.monotonic() - start_time)) > 0:
+        server_up = False
+        try:
+            ready = await ready_event_async(client, remaining)
+            if ready:
+                return time.monotonic() - start_time
+            if ready is None:
+                if await poll_health_async(client, remaining) is None:
+                    return None
+                return time.monotonic() - start_time
+            server_up = True
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(min(delay, remaining))
+        delay = next_poll_delay(delay, server_up)
+    return None
+
+async def poll_health_async(client, timeout):
+    """Poll /health until it returns 200; return the seconds waited, or None on timeout"""
+    import httpx
+    
+    start_time = time.monotonic()
+    delay = INITIAL_POLL_DELAY
+    method = READINESS_METHOD
+    while (remaining := timeout - (time.monotonic() - start_time)) > 0:
+        server_up = False
+        try:
+            response = await client.request(method, "/health", timeout=2)
+            if response.status_code == 200:
+                return time.monotonic() - start_time
+            server_up = True
+            if (fallback := next_readiness_method(method, response.status_code)) != method:
+                method = fallback
+                continue
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(min(delay, remaining))
+        delay = next_poll_delay(delay, server_up)
+    return None
+
+async def probe_async(client, method, path, model=None, **kwargs):
+    """Issue one request; return (status code, body decoded by decode_reply)"""
+    response = await client.request(method, path, **kwargs)
+    return response.status_code, decode_reply(response.content, model)
+
+async def cached_probe_async(client, path):
+    """GET through the on-disk cache; return (status code, decoded JSON body or None)"""
+    url = str(client.build_request('GET', path).url)
+    entry = cache_lookup(url)
+    response = await client.get(path, headers=revalidation_headers(entry))
+    return cache_update(url, entry, response.status_code, response.headers.get('ETag'),
+                        decode_reply(response.content))
+
+async def timed_probe_async(client, path, payload, batch=False, **kwargs):
+    """
+    POST a simulation; return ((status code, summary of the result or None), seconds).
+    The clock stops once the reply is read, before it is decoded. Exceptions are
+    returned in place of the reply, not raised.
+    """
+    start_time = time.perf_counter()
+    try:
+        response = await client.post(path, json=payload, **kwargs)
+    except Exception as e:
+        return e, time.perf_counter() - start_time
+    elapsed = time.perf_counter() - start_time
+    return (response.status_code, decode_reply(response.content, BatchReply if batch else SimulationReply)), elapsed
+
+async def simulate_probe_async(client, path, payload, batch=False, **kwargs):
+    """POST a simulation; return (status code, summary of the result or None)"""
+    reply, _ = await timed_probe_async(client, path, payload, batch, **kwargs)
+    if isinstance(reply, Exception):
+        raise reply
+    return reply
+
+async def collect_replies_async(base_url, timeout):
+    """
+    Wait for the container, then fire the independent probes concurrently.
+    Returns (seconds until ready or None, replies by step).
+    """
+    import httpx
+    
+    async with httpx.AsyncClient(base_url=base_url, http2=HTTP2_AVAILABLE, timeout=5) as client:
+        ready_after = await wait_for_container_async(client, timeout)
+        if ready_after is None:
+            return None, {}
+        
+        health, info, examples, batch_probe = await asyncio.gather(
+            probe_async(client, 'GET', "/health", HealthReply),
+            cached_probe_async(client, "/info"),
+            cached_probe_async(client, "/example_circuits"),
+            probe_async(client, 'HEAD', "/simulate_batch"),
+            return_exceptions=True
+        )
+        
+        if batch_supported(batch_probe):
+            # One request covers every simulation, so it is also the timing
+            batch, batch_time = await timed_probe_async(
+                client, "/simulate_batch", BATCH_PAYLOAD, batch=True, timeout=30
+            )
+            simulations, error = split_batch_reply(batch)
+            response_time = (BATCH_TIMING, batch_time)
+        else:
+            simulation_requests = [
+                timed_probe_async(client, "/simulate", {"qiskit_code": test_circuit.code}, timeout=30)
+                for test_circuit in TEST_CIRCUITS
+            ]
+            error_request = simulate_probe_async(client, "/simulate", ERROR_PAYLOAD, timeout=10)
+            *timed_simulations, error = await asyncio.gather(
+                *simulation_requests, error_request, return_exceptions=True
+            )
+            simulations = [reply for reply, _ in timed_simulations]
+            elapsed = {
+                test_circuit.name: seconds
+                for test_circuit, (_, seconds) in zip(TEST_CIRCUITS, timed_simulations)
+            }
+            response_time = (TIMED_CIRCUIT, elapsed[TIMED_CIRCUIT])
+    
+    return ready_after, {
+        'health': health,
+        'info': info,
+        'examples': examples,
+        'simulations': simulations,
+        'response_time': response_time,
+        'error': error,
+    }
+
+def ready_event(base_url, timeout):
+    """Blocking variant of ready_event_async"""
+    with get_session().get(f"{base_url}/events", stream=True, timeout=(2, timeout)) as response:
+        if events_unsupported(response.status_code, response.headers.get('Content-Type', '')):
+            return None
+        # Event streams are always UTF-8
+        response.encoding = 'utf-8'
+        for line in response.iter_lines(decode_unicode=True):
+            if is_ready_event(line):
+                return True
+    return False
+
+def wait_for_container(base_url, timeout):
+    """Blocking variant of wait_for_container_async, used with --no-async"""
+    import requests
+    
+    start_time = time.monotonic()
+    delay = INITIAL_POLL_DELAY
+    while (remaining := timeout - (time.monotonic() - start_time)) > 0:
+        server_up = False
+        try:
+            ready = ready_event(base_url, remaining)
+            if ready:
+                return time.monotonic() - start_time
+            if ready is None:
+                if poll_health(base_url, remaining) is None:
+                    return None
+                return time.monotonic() - start_time
+            server_up = True
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(min(delay, remaining))
+        delay = next_poll_delay(delay, server_up)
+    return None
+
+def poll_health(base_url, timeout):
+    """Blocking variant of poll_health_async"""
+    import requests
+    
+    start_time = time.monotonic()
+    delay = INITIAL_POLL_DELAY
+    method = READINESS_METHOD
+    while (remaining := timeout - (time.monotonic() - start_time)) > 0:
+        server_up = False
+        try:
+            response = get_session().request(method, f"{base_url}/health", timeout=2)
+            if response.status_code == 200:
+                return time.monotonic() - start_time
+            server_up = True
+            if (fallback := next_readiness_method(method, response.status_code)) != method:
+                method = fallback
+                continue
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(min(delay, remaining))
+        delay = next_poll_delay(delay, server_up)
+    return None
+
+def probe(method, url, model=None, **kwargs):
+    """Blocking variant of probe_async; exceptions are returned, not raised"""
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except Exception as e:
+        return e
+    return response.status_code, decode_reply(response.content, model)
+
+def timed_probe(url, payload, batch=False, **kwargs):
+    """Blocking variant of timed_probe_async"""
+    start_time = time.perf_counter()
+    try:
+        response = get_session().post(url, json=payload, **kwargs)
+    except Exception as e:
+        return e, time.perf_counter() - start_time
+    elapsed = time.perf_counter() - start_time
+    return (response.status_code, decode_reply(response.content, BatchReply if batch else SimulationReply)), elapsed
+
+def simulate_probe(url, payload, batch=False, **kwargs):
+    """Blocking variant of simulate_probe_async; exceptions are returned, not raised"""
+    reply, _ = timed_probe(url, payload, batch, **kwargs)
+    return reply
+
+def cached_probe(url):
+    """GET through the on-disk cache; exceptions are returned, not raised"""
+    entry = cache_lookup(url)
+    try:
+        response = get_session().get(url, headers=revalidation_headers(entry))
+    except Exception as e:
+        return e
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    return cache_update(url, entry, response.status_code, response.headers.get('ETag'), data)
+
+def collect_replies(base_url, timeout):
+    """Blocking variant of collect_replies_async, issuing one request at a time"""
+    ready_after = wait_for_container(base_url, timeout)
+    if ready_after is None:
+        return None, {}
+    
+    replies = {
+        'health': probe('GET', f"{base_url}/health", HealthReply),
+        'info': cached_probe(f"{base_url}/info"),
+        'examples': cached_probe(f"{base_url}/example_circuits"),
+    }
+    
+    if batch_supported(probe('HEAD', f"{base_url}/simulate_batch")):
+        batch, batch_time = timed_probe(f"{base_url}/simulate_batch", BATCH_PAYLOAD, batch=True, timeout=30)
+        replies['simulations'], replies['error'] = split_batch_reply(batch)
+        replies['response_time'] = (BATCH_TIMING, batch_time)
+        return ready_after, replies
+    
+    replies['simulations'] = []
+    for test_circuit in TEST_CIRCUITS:
+        reply, seconds = timed_probe(
+            f"{base_url}/simulate", {"qiskit_code": test_circuit.code}, timeout=30
+        )
+        replies['simulations'].append(reply)
+        if test_circuit.name == TIMED_CIRCUIT:
+            replies['response_time'] = (TIMED_CIRCUIT, seconds)
+    replies['error'] = simulate_probe(f"{base_url}/simulate", ERROR_PAYLOAD, timeout=10)
+    
+    return ready_after, replies
+
+def report_health(reply):
+    """Print the health endpoint result; return True if it passed"""
+    if isinstance(reply, Exception):
+        print(f"[FAIL] Health check error: {reply}")
+        return False
+    
+    status, health_data = reply
+    if status != 200:
+        print(f"[FAIL] Health check failed with status {status}")
+        return False
+    
+    print("[OK] Health check passed")
+    print(f"    Status: {health_data.status}")
+    print(f"    Environment: {health_data.environment}")
+    print(f"    Qiskit Available: {health_data.qiskit_available}")
+    print(f"    Version: {health_data.version}")
+    return True
+
+def report_info(reply):
+    """Print the system info endpoint result; return True if it passed"""
+    if isinstance(reply, Exception):
+        print(f"[FAIL] System info error: {reply}")
+        return False
+    
+    status, info_data = reply
+    if status != 200:
+        print(f"[FAIL] System info failed with status {status}")
+        return False
+    
+    print("[OK] System info retrieved")
+    system_info = info_data.get('system_info', {})
+    print(f"    Python Version: {system_info.get('python_version')}")
+    print(f"    Flask Version: {system_info.get('flask_version')}")
+    print(f"    Container: {system_info.get('container')}")
+    print(f"    Qiskit Available: {system_info.get('qiskit_available')}")
+    return True
+
+def report_examples(reply):
+    """Print the example circuits endpoint result; return True if it passed"""
+    if isinstance(reply, Exception):
+        print(f"[FAIL] Example circuits error: {reply}")
+        return False
+    
+    status, examples_data = reply
+    if status != 200:
+        print(f"[FAIL] Example circuits failed with status {status}")
+        return False
+    
+    print("[OK] Example circuits retrieved")
+    examples = examples_data.get('examples', {})
+    print(f"    Available examples: {len(examples)}")
+    for name in examples.keys():
+        print(f"      - {name}")
+    return True
+
+def report_simulation(test_circuit, reply):
+    """Print one test circuit's simulation result; return True if it passed"""
+    print(f"   Testing {test_circuit.name}...")
+    if isinstance(reply, Exception):
+        print(f"   [FAIL] {test_circuit.name} error: {reply}")
+        return False
+    
+    status, result = reply
+    if status != 200:
+        print(f"   [FAIL] {test_circuit.name} HTTP error {status}")
+        return False
+    if not result.success:
+        print(f"   [FAIL] {test_circuit.name} simulation failed: {result.error}")
+        return False
+    
+    print(f"   [OK] {test_circuit.name} simulation successful")
+    print(f"        Qubits: {result.num_qubits}")
+    print(f"        Simulation Type: {result.simulation_type}")
+    print(f"        States: {result.num_states}")
+    
+    # Verify expected number of qubits
+    if result.num_qubits == test_circuit.expected_qubits:
+        print(f"        [OK] Correct number of qubits")
+    else:
+        print(f"        [WARN] Expected {test_circuit.expected_qubits} qubits, got {result.num_qubits}")
+    return True
+
+def report_error_handling(reply):
+    """Print the invalid-code result; return True unless the request itself failed"""
+    if isinstance(reply, Exception):
+        print(f"[FAIL] Error handling test failed: {reply}")
+        return False
+    
+    status, result = reply
+    if status >= 400:
+        if result and not result.success and result.error is not None:
+            print("[OK] Error handling works correctly")
+            print(f"    Error message: {result.error[:100]}...")
+        else:
+            print("[WARN] Error response format unexpected")
+    else:
+        print("[WARN] Expected error response but got success")
+    return True
+
+def report_response_time(label, response_time):
+    """Print the timed round trip, labelled with what was timed"""
+    print(f"   Response time ({label}): {response_time:.2f}s")
+    if response_time < 5.0:
+        print("   [OK] Fast response time")
+    else:
+        print("   [WARN] Slow response time")
+
+def test_docker_deployment(base_url="http://localhost:5000", timeout=60, use_async=True):
     """Test the Docker deployment of the quantum backend"""
     
     print("Testing Quantum Visualizer 3D Docker Deployment...")
     print("=" * 60)
     print(f"Target URL: {base_url}")
-    print()
+    print(flush=True)
     
-    # Wait for container to be ready
+    # Wait for container to be ready, then collect every endpoint's reply
     print("1. Waiting for container to be ready...")
-    start_time = time.time()
+    print("    Waiting for container... (this may take a few minutes for first start)", flush=True)
+    if use_async and HTTPX_AVAILABLE:
+        ready_after, replies = asyncio.run(collect_replies_async(base_url, timeout))
+    else:
+        ready_after, replies = collect_replies(base_url, timeout)
     
-    while time.time() - start_time < timeout:
-        try:
-            response = requests.get(f"{base_url}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"[OK] Container is ready after {time.time() - start_time:.1f}s")
-                break
-        except requests.exceptions.RequestException:
-            pass
-        
-        print("    Waiting for container... (this may take a few minutes for first start)")
-        time.sleep(5)
+    if ready_after is not None:
+        print(f"[OK] Container is ready after {ready_after:.1f}s")
     else:
         print("[FAIL] Container did not start within timeout period")
         print("Check if Docker container is running:")
@@ -39,177 +572,38 @@ def test_docker_deployment(base_url="http://localhost:5000", timeout=60):
         print("  docker logs quantum-visualizer-backend")
         return False
     
-    print()
+    print(flush=True)
+    
+    # Every step is reported; the run fails if any of them did
+    results = []
     
     # Test health endpoint
     print("2. Testing health endpoint...")
-    try:
-        response = requests.get(f"{base_url}/health")
-        if response.status_code == 200:
-            health_data = response.json()
-            print("[OK] Health check passed")
-            print(f"    Status: {health_data.get('status')}")
-            print(f"    Environment: {health_data.get('environment')}")
-            print(f"    Qiskit Available: {health_data.get('qiskit_available')}")
-            print(f"    Version: {health_data.get('version')}")
-        else:
-            print(f"[FAIL] Health check failed with status {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"[FAIL] Health check error: {e}")
-        return False
-    
-    print()
+    results.append(report_health(replies['health']))
+    print(flush=True)
     
     # Test system info endpoint
     print("3. Testing system info endpoint...")
-    try:
-        response = requests.get(f"{base_url}/info")
-        if response.status_code == 200:
-            info_data = response.json()
-            print("[OK] System info retrieved")
-            system_info = info_data.get('system_info', {})
-            print(f"    Python Version: {system_info.get('python_version')}")
-            print(f"    Flask Version: {system_info.get('flask_version')}")
-            print(f"    Container: {system_info.get('container')}")
-            print(f"    Qiskit Available: {system_info.get('qiskit_available')}")
-        else:
-            print(f"[FAIL] System info failed with status {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"[FAIL] System info error: {e}")
-        return False
-    
-    print()
+    results.append(report_info(replies['info']))
+    print(flush=True)
     
     # Test example circuits endpoint
     print("4. Testing example circuits endpoint...")
-    try:
-        response = requests.get(f"{base_url}/example_circuits")
-        if response.status_code == 200:
-            examples_data = response.json()
-            print("[OK] Example circuits retrieved")
-            examples = examples_data.get('examples', {})
-            print(f"    Available examples: {len(examples)}")
-            for name in examples.keys():
-                print(f"      - {name}")
-        else:
-            print(f"[FAIL] Example circuits failed with status {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"[FAIL] Example circuits error: {e}")
-        return False
-    
-    print()
+    results.append(report_examples(replies['examples']))
+    print(flush=True)
     
     # Test quantum simulation
     print("5. Testing quantum simulation endpoint...")
-    
-    test_circuits = [
-        {
-            "name": "Bell State",
-            "code": '''# Bell State
-circ = QuantumCircuit(2)
-circ.h(0)
-circ.cx(0, 1)''',
-            "expected_qubits": 2
-        },
-        {
-            "name": "Superposition",
-            "code": '''# Superposition
-circ = QuantumCircuit(1)
-circ.h(0)''',
-            "expected_qubits": 1
-        }
-    ]
-    
-    for test_circuit in test_circuits:
-        print(f"   Testing {test_circuit['name']}...")
-        try:
-            payload = {"qiskit_code": test_circuit["code"]}
-            response = requests.post(
-                f"{base_url}/simulate",
-                headers={'Content-Type': 'application/json'},
-                data=json.dumps(payload),
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    print(f"   [OK] {test_circuit['name']} simulation successful")
-                    print(f"        Qubits: {result.get('num_qubits')}")
-                    print(f"        Simulation Type: {result.get('simulation_type', 'unknown')}")
-                    print(f"        States: {len(result.get('statevector', []))}")
-                    
-                    # Verify expected number of qubits
-                    if result.get('num_qubits') == test_circuit['expected_qubits']:
-                        print(f"        [OK] Correct number of qubits")
-                    else:
-                        print(f"        [WARN] Expected {test_circuit['expected_qubits']} qubits, got {result.get('num_qubits')}")
-                else:
-                    print(f"   [FAIL] {test_circuit['name']} simulation failed: {result.get('error')}")
-                    return False
-            else:
-                print(f"   [FAIL] {test_circuit['name']} HTTP error {response.status_code}")
-                return False
-        except Exception as e:
-            print(f"   [FAIL] {test_circuit['name']} error: {e}")
-            return False
-    
-    print()
+    for test_circuit, reply in zip(TEST_CIRCUITS, replies['simulations']):
+        results.append(report_simulation(test_circuit, reply))
+    report_response_time(*replies['response_time'])
+    print(flush=True)
     
     # Test error handling
     print("6. Testing error handling...")
-    try:
-        payload = {"qiskit_code": "invalid python code"}
-        response = requests.post(
-            f"{base_url}/simulate",
-            headers={'Content-Type': 'application/json'},
-            data=json.dumps(payload),
-            timeout=10
-        )
-        
-        if response.status_code >= 400:
-            result = response.json()
-            if not result.get('success') and 'error' in result:
-                print("[OK] Error handling works correctly")
-                print(f"    Error message: {result['error'][:100]}...")
-            else:
-                print("[WARN] Error response format unexpected")
-        else:
-            print("[WARN] Expected error response but got success")
-    except Exception as e:
-        print(f"[FAIL] Error handling test failed: {e}")
-        return False
-    
-    print()
+    results.append(report_error_handling(replies['error']))
     
-    # Performance test
-    print("7. Testing performance...")
-    try:
-        start_time = time.time()
-        payload = {"qiskit_code": "circ = QuantumCircuit(1)\ncirc.h(0)"}
-        response = requests.post(
-            f"{base_url}/simulate",
-            headers={'Content-Type': 'application/json'},
-            data=json.dumps(payload),
-            timeout=10
-        )
-        response_time = time.time() - start_time
-        
-        if response.status_code == 200 and response.json().get('success'):
-            print(f"[OK] Performance test passed")
-            print(f"    Response time: {response_time:.2f}s")
-            if response_time < 5.0:
-                print("    [OK] Fast response time")
-            else:
-                print("    [WARN] Slow response time")
-        else:
-            print("[FAIL] Performance test failed")
-            return False
-    except Exception as e:
-        print(f"[FAIL] Performance test error: {e}")
+    if not all(results):
         return False
     
     print()
@@ -227,18 +621,27 @@ circ.h(0)''',
     print(f"  GET  {base_url}/info")
     print(f"  GET  {base_url}/example_circuits")
     print(f"  POST {base_url}/simulate")
+    print(f"  POST {base_url}/simulate_batch")
     
     return True
 
+# test_docker_deployment() is the script's run, not a pytest test; under pytest
+# it would wait out the readiness timeout whenever no backend is up
+test_docker_deployment.__test__ = False
+
 def main():
     """Main function"""
-    # Check for custom URL
-    base_url = "http://localhost:5000"
-    if len(sys.argv) > 1:
-        base_url = sys.argv[1]
+    # Check for custom URL and the --no-async flag
+    args = [arg for arg in sys.argv[1:] if arg != '--no-async']
+    base_url = args[0] if args else "http://localhost:5000"
+    use_async = '--no-async' not in sys.argv[1:]
+    
+    # Report lines are written as each step completes; flushing once per step
+    # instead of per line keeps print off the syscall path on slow consoles
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
     
     # Run the test
-    success = test_docker_deployment(base_url)
+    success = test_docker_deployment(base_url, use_async=use_async)
     
     if not success:
         print()
@@ -261,4 +664,4 @@ def main():
     sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
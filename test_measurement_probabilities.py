@@ -0,0 +1,44 @@
+"""
+Tests that the Numba probability kernel agrees with the NumPy reductions
+
+These run in-process and need no backend server.
+"""
+
+import numpy as np
+import pytest
+
+import _backend_common
+from _backend_common import BIT_MATRIX_MAX_QUBITS, _measurement_probabilities
+
+def random_amplitudes(num_qubits, dtype):
+    """A normalized random statevector"""
+    rng = np.random.default_rng(num_qubits)
+    amplitudes = rng.standard_normal(2**num_qubits) + 1j * rng.standard_normal(2**num_qubits)
+    return (amplitudes / np.linalg.norm(amplitudes)).astype(dtype)
+
+@pytest.mark.parametrize("num_qubits", (BIT_MATRIX_MAX_QUBITS + 1, BIT_MATRIX_MAX_QUBITS + 4))
+@pytest.mark.parametrize("dtype", (np.complex64, np.complex128))
+def test_numba_matches_numpy(monkeypatch, num_qubits, dtype):
+    if not _backend_common.NUMBA_AVAILABLE:
+        pytest.skip("numba is not installed")
+    amplitudes = random_amplitudes(num_qubits, dtype)
+    numba_probabilities, numba_prob_1 = _measurement_probabilities(amplitudes, num_qubits)
+    
+    monkeypatch.setattr(_backend_common, 'NUMBA_AVAILABLE', False)
+    numpy_probabilities, numpy_prob_1 = _measurement_probabilities(amplitudes, num_qubits)
+    
+    rtol = 1e-5 if dtype is np.complex64 else 1e-12
+    assert numba_probabilities.dtype == numpy_probabilities.dtype
+    np.testing.assert_allclose(numba_probabilities, numpy_probabilities, rtol=rtol)
+    np.testing.assert_allclose(numba_prob_1, numpy_prob_1, rtol=rtol)
+
+@pytest.mark.parametrize("num_qubits", (1, BIT_MATRIX_MAX_QUBITS, BIT_MATRIX_MAX_QUBITS + 1))
+def test_marginals_match_basis_state_sums(monkeypatch, num_qubits):
+    monkeypatch.setattr(_backend_common, 'NUMBA_AVAILABLE', False)
+    amplitudes = random_amplitudes(num_qubits, np.complex128)
+    probabilities, prob_1 = _measurement_probabilities(amplitudes, num_qubits)
+    
+    # Qiskit is little-endian: qubit k is bit k of the basis state index
+    indices = np.arange(2**num_qubits)
+    expected = [probabilities[(indices >> qubit_idx) & 1 == 1].sum() for qubit_idx in range(num_qubits)]
+    np.testing.assert_allclose(prob_1, expected, rtol=1e-12)
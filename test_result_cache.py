@@ -0,0 +1,40 @@
+"""
+Tests for the per-worker simulation result cache
+
+These run in-process and need no backend server.
+"""
+
+from _backend_common import CACHE_MAX_QUBITS, _parse_circuit_code, _result_cache
+
+BELL_PARSED = _parse_circuit_code("circ = QuantumCircuit(2)\ncirc.h(0)\ncirc.cx(0, 1)")
+
+def counting_simulation(num_qubits):
+    """A stand-in for _simulate_cached that records its calls"""
+    calls = []
+    
+    @_result_cache
+    def simulate(tree, precision='single', device='auto'):
+        calls.append((tree, precision, device))
+        return (num_qubits, None, None, (), 0, 0)
+    
+    return simulate, calls
+
+def test_hit_ignores_comments_and_formatting():
+    simulate, calls = counting_simulation(2)
+    first = simulate(*BELL_PARSED)
+    commented = _parse_circuit_code("# Bell state\ncirc = QuantumCircuit(2)\ncirc.h(0)  # H\ncirc.cx(0,1)\n")
+    assert simulate(*commented) is first
+    assert len(calls) == 1
+
+def test_precision_and_device_are_cached_separately():
+    simulate, calls = counting_simulation(2)
+    simulate(*BELL_PARSED, 'single', 'auto')
+    simulate(*BELL_PARSED, 'double', 'auto')
+    simulate(*BELL_PARSED, 'single', 'cpu')
+    assert len(calls) == 3
+
+def test_large_circuits_are_not_cached():
+    simulate, calls = counting_simulation(CACHE_MAX_QUBITS + 1)
+    simulate(*BELL_PARSED)
+    simulate(*BELL_PARSED)
+    assert len(calls) == 2
@@ -3,12 +3,61 @@
 Test script for the Simple Quantum Visualizer 3D Backend
 """
 
-import requests
-import json
-import time
+import sys
+
+from _test_fixtures import (
+    BELL_STATE, GHZ_STATE, SUPERPOSITION, X_GATE, cache_lookup, cache_update, revalidation_headers
+)
+
+# One pooled session keeps connections alive across the test requests. It is
+# built on first use, so importing this module does not load requests.
+_session = None
+
+def get_session():
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+    return _session
+
+def cached_get(url):
+    """GET through the on-disk cache; return (status code, decoded JSON body or None)"""
+    entry = cache_lookup(url)
+    response = get_session().get(url, headers=revalidation_headers(entry))
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    return cache_update(url, entry, response.status_code, response.headers.get('ETag'), data)
+
+def marginal_array(result):
+    """Marginal probabilities as an (n, 2) array of [P(|0>), P(|1>)] rows"""
+    import numpy as np
+    
+    return np.array(
+        [[mp['prob_0'], mp['prob_1']] for mp in result['marginal_probabilities']],
+        dtype=np.float64,
+    )
+
+def is_cat_state(result):
+    """Whether an n-qubit result is |0...0> and |1...1> with probability 0.5 each"""
+    import numpy as np
+    
+    probabilities = np.asarray(result['probabilities'], dtype=np.float64)
+    last = (1 << result['num_qubits']) - 1
+    return len(probabilities) == last + 1 and bool(np.allclose(probabilities[[0, last]], 0.5, atol=1e-3))
+
+def print_marginals(marginals):
+    for qubit, (prob_0, prob_1) in enumerate(marginals):
+        print(f"  Qubit {qubit}: P(|0>)={prob_0:.3f}, P(|1>)={prob_1:.3f}")
 
 def test_simple_backend():
     """Test the simple quantum backend API"""
+    import numpy as np
+    import requests
+    
     base_url = "http://localhost:5000"
     
     print("Testing Simple Quantum Visualizer 3D Backend...")
@@ -17,7 +66,7 @@ def test_simple_backend():
     # Test health check
     print("1. Testing health check...")
     try:
-        response = requests.get(f"{base_url}/health")
+        response = get_session().get(f"{base_url}/health")
         if response.status_code == 200:
             print("[OK] Health check passed")
             result = response.json()
@@ -33,14 +82,14 @@ def test_simple_backend():
         print("   Run: python quantum_backend_simple.py")
         return False
     
-    print()
+    print(flush=True)
     
     # Test example circuits endpoint
     print("2. Testing example circuits...")
-    response = requests.get(f"{base_url}/example_circuits")
-    if response.status_code == 200:
+    status, examples_data = cached_get(f"{base_url}/example_circuits")
+    if status == 200:
         print("[OK] Example circuits retrieved")
-        examples = response.json()['examples']
+        examples = examples_data['examples']
         print(f"  Found {len(examples)} example circuits")
         for name in examples.keys():
             print(f"    - {name}")
@@ -48,22 +97,15 @@ def test_simple_backend():
         print("[FAIL] Failed to get example circuits")
         return False
     
-    print()
+    print(flush=True)
     
     # Test Bell state simulation
     print("3. Testing Bell state simulation...")
-    bell_circuit = '''# Bell State
-circ = QuantumCircuit(2)
-circ.h(0)
-circ.cx(0, 1)'''
-    
     payload = {
-        "qiskit_code": bell_circuit
+        "qiskit_code": BELL_STATE.code
     }
     
-    response = requests.post(f"{base_url}/simulate", 
-                           headers={'Content-Type': 'application/json'},
-                           data=json.dumps(payload))
+    response = get_session().post(f"{base_url}/simulate", json=payload)
     
     if response.status_code == 200:
         result = response.json()
@@ -74,18 +116,17 @@ circ.cx(0, 1)'''
             print(f"  Marginal probabilities: {len(result['marginal_probabilities'])} qubits")
             
             # Check Bell state properties
-            probabilities = result['probabilities']
-            print(f"  State probabilities: {[f'{p:.3f}' for p in probabilities]}")
+            probabilities = np.asarray(result['probabilities'], dtype=np.float64)
+            print(f"  State probabilities: {np.array2string(probabilities, precision=3, separator=', ')}")
             
-            # Verify Bell state entanglement pattern
-            if abs(probabilities[0] - 0.5) < 0.001 and abs(probabilities[3] - 0.5) < 0.001:
+            # Verify Bell state entanglement pattern (|00> and |11> at 0.5 each)
+            if is_cat_state(result):
                 print("  [OK] Correct Bell state entanglement pattern detected")
             else:
                 print("  [WARN] Unexpected probability distribution")
             
             # Show marginal probabilities
-            for mp in result['marginal_probabilities']:
-                print(f"  Qubit {mp['qubit']}: P(|0>)={mp['prob_0']:.3f}, P(|1>)={mp['prob_1']:.3f}")
+            print_marginals(marginal_array(result))
         else:
             print("[FAIL] Bell state simulation failed")
             print(f"  Error: {result['error']}")
@@ -95,41 +136,32 @@ circ.cx(0, 1)'''
         print(f"  Status: {response.status_code}")
         return False
     
-    print()
+    print(flush=True)
     
     # Test GHZ state simulation
     print("4. Testing GHZ state simulation...")
-    ghz_circuit = '''# GHZ State
-circ = QuantumCircuit(3)
-circ.h(0)
-circ.cx(0, 1)
-circ.cx(0, 2)'''
-    
     payload = {
-        "qiskit_code": ghz_circuit
+        "qiskit_code": GHZ_STATE.code
     }
     
-    response = requests.post(f"{base_url}/simulate",
-                           headers={'Content-Type': 'application/json'},
-                           data=json.dumps(payload))
+    response = get_session().post(f"{base_url}/simulate", json=payload)
     
     if response.status_code == 200:
         result = response.json()
         if result['success']:
             print("[OK] GHZ state simulation successful")
             print(f"  Number of qubits: {result['num_qubits']}")
-            probabilities = result['probabilities']
-            print(f"  State probabilities: {[f'{p:.3f}' for p in probabilities]}")
+            probabilities = np.asarray(result['probabilities'], dtype=np.float64)
+            print(f"  State probabilities: {np.array2string(probabilities, precision=3, separator=', ')}")
             
             # Check GHZ state properties (|000> and |111> should have equal probability)
-            if abs(probabilities[0] - 0.5) < 0.001 and abs(probabilities[7] - 0.5) < 0.001:
+            if is_cat_state(result):
                 print("  [OK] Correct GHZ state pattern detected")
             else:
                 print("  [WARN] Unexpected probability distribution")
             
             # Show marginal probabilities
-            for mp in result['marginal_probabilities']:
-                print(f"  Qubit {mp['qubit']}: P(|0>)={mp['prob_0']:.3f}, P(|1>)={mp['prob_1']:.3f}")
+            print_marginals(marginal_array(result))
         else:
             print("[FAIL] GHZ state simulation failed")
             print(f"  Error: {result['error']}")
@@ -138,31 +170,25 @@ circ.cx(0, 2)'''
         print("[FAIL] GHZ state API call failed")
         return False
     
-    print()
+    print(flush=True)
     
     # Test superposition state
     print("5. Testing single qubit superposition...")
-    superposition_circuit = '''# Superposition
-circ = QuantumCircuit(1)
-circ.h(0)'''
-    
     payload = {
-        "qiskit_code": superposition_circuit
+        "qiskit_code": SUPERPOSITION.code
     }
     
-    response = requests.post(f"{base_url}/simulate",
-                           headers={'Content-Type': 'application/json'},
-                           data=json.dumps(payload))
+    response = get_session().post(f"{base_url}/simulate", json=payload)
     
     if response.status_code == 200:
         result = response.json()
         if result['success']:
             print("[OK] Superposition simulation successful")
-            marginal_probs = result['marginal_probabilities'][0]
-            print(f"  Qubit 0 - P(|0>): {marginal_probs['prob_0']:.3f}, P(|1>): {marginal_probs['prob_1']:.3f}")
+            qubit_0 = marginal_array(result)[0]
+            print(f"  Qubit 0 - P(|0>): {qubit_0[0]:.3f}, P(|1>): {qubit_0[1]:.3f}")
             
             # Check equal superposition
-            if abs(marginal_probs['prob_0'] - 0.5) < 0.001 and abs(marginal_probs['prob_1'] - 0.5) < 0.001:
+            if np.allclose(qubit_0, 0.5, atol=1e-3):
                 print("  [OK] Perfect superposition detected")
             else:
                 print("  [WARN] Unexpected superposition probabilities")
@@ -174,31 +200,25 @@ circ.h(0)'''
         print("[FAIL] Superposition API call failed")
         return False
     
-    print()
+    print(flush=True)
     
     # Test X gate
     print("6. Testing X gate...")
-    x_circuit = '''# X Gate
-circ = QuantumCircuit(1)
-circ.x(0)'''
-    
     payload = {
-        "qiskit_code": x_circuit
+        "qiskit_code": X_GATE.code
     }
     
-    response = requests.post(f"{base_url}/simulate",
-                           headers={'Content-Type': 'application/json'},
-                           data=json.dumps(payload))
+    response = get_session().post(f"{base_url}/simulate", json=payload)
     
     if response.status_code == 200:
         result = response.json()
         if result['success']:
             print("[OK] X gate simulation successful")
-            marginal_probs = result['marginal_probabilities'][0]
-            print(f"  Qubit 0 - P(|0>): {marginal_probs['prob_0']:.3f}, P(|1>): {marginal_probs['prob_1']:.3f}")
+            qubit_0 = marginal_array(result)[0]
+            print(f"  Qubit 0 - P(|0>): {qubit_0[0]:.3f}, P(|1>): {qubit_0[1]:.3f}")
             
             # Check X gate result (should be |1>)
-            if marginal_probs['prob_0'] < 0.001 and abs(marginal_probs['prob_1'] - 1.0) < 0.001:
+            if np.allclose(qubit_0, [0.0, 1.0], atol=1e-3):
                 print("  [OK] Correct X gate result (|1> state)")
             else:
                 print("  [WARN] Unexpected X gate result")
@@ -223,5 +243,48 @@ circ.x(0)'''
     
     return True
 
+# test_simple_backend() is the script's run. Under pytest the same checks are
+# the tests below, which share the warmed-up client and simulations from conftest.py
+test_simple_backend.__test__ = False
+
+def simulated_result(simulations, circuit):
+    """The decoded result for one of conftest's simulations, checked for success"""
+    response = simulations[circuit.name]
+    assert response.status_code == 200
+    result = response.json()
+    assert result['success'], result.get('error')
+    assert result['num_qubits'] == circuit.expected_qubits
+    return result
+
+async def test_health(client):
+    response = await client.get("/health")
+    assert response.status_code == 200
+    assert response.json()['status'] == 'healthy'
+
+async def test_example_circuits(client):
+    response = await client.get("/example_circuits")
+    assert response.status_code == 200
+    assert response.json()['examples']
+
+def test_bell_state(simulations):
+    result = simulated_result(simulations, BELL_STATE)
+    assert len(result['statevector']) == 4
+    assert is_cat_state(result)
+
+def test_ghz_state(simulations):
+    assert is_cat_state(simulated_result(simulations, GHZ_STATE))
+
+def test_superposition(simulations):
+    import numpy as np
+    
+    assert np.allclose(marginal_array(simulated_result(simulations, SUPERPOSITION))[0], 0.5, atol=1e-3)
+
+def test_x_gate(simulations):
+    import numpy as np
+    
+    assert np.allclose(marginal_array(simulated_result(simulations, X_GATE))[0], [0.0, 1.0], atol=1e-3)
+
 if __name__ == "__main__":
+    # Flush once per test step instead of on every line
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
     test_simple_backend()
\ No newline at end of file